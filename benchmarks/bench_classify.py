@@ -0,0 +1,148 @@
+"""
+Block aggregation and classification on 1,000+ pages: the previous list-based code vs the current one.
+
+    python benchmarks/bench_classify.py --pages 1000
+
+The sample RFPs are laid out once with pdfminer and their pages cycled up to --pages, so only
+the per-character aggregation (_page_blocks) and classify_blocks are timed, not PDF parsing.
+"""
+import argparse
+import glob
+import itertools
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer, LTChar
+from visual_chunker import _page_blocks, classify_blocks
+
+RFP_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "rfps")
+
+
+# ------------------------------------------
+# Previous implementations, kept here as the reference
+# ------------------------------------------
+def legacy_page_blocks(page_layout):
+    blocks = []
+    bold_detected = False
+    for element in page_layout:
+        if isinstance(element, LTTextContainer):
+            text = element.get_text().strip()
+            if not text:
+                continue
+            font_sizes = []
+            bold_flags = []
+            for line in element:
+                for char in line:
+                    if isinstance(char, LTChar):
+                        font_sizes.append(char.size)
+                        is_bold = "bold" in char.fontname.lower()
+                        bold_flags.append(is_bold)
+                        if is_bold:
+                            bold_detected = True
+            avg_size = (int(sum(font_sizes) / len(font_sizes)) + 1) if font_sizes else 0
+            bold_ratio = sum(bold_flags) / len(bold_flags) if bold_flags else 0
+            blocks.append((avg_size, bold_ratio, text))
+    return blocks, bold_detected
+
+
+def legacy_classify_blocks(blocks, bold_supported):
+    font_sizes = [size for size, _, _ in blocks]
+    threshold = sorted(font_sizes)[int(0.85 * len(font_sizes))] if font_sizes else 12
+
+    chunks = []
+    current_title = "Untitled Section"
+    current_content = ""
+    content_started = False
+
+    def is_subheading(text):
+        return bool(re.match(r"^([A-Za-z0-9]+[.)]|\d+\.\d+)", text.strip()))
+
+    for size, bold_ratio, text in blocks:
+        if bold_supported:
+            is_likely_header = (size >= threshold and bold_ratio >= 0.8 and len(text.split()) < 10)
+        else:
+            is_likely_header = (size >= threshold and len(text.split()) < 15)
+
+        if is_likely_header:
+            if content_started:
+                chunks.append((current_title, current_content.strip()))
+                current_title = text.strip()
+                current_content = ""
+                content_started = False
+            else:
+                if current_title == "Untitled Section":
+                    current_title = text.strip()
+                elif is_subheading(text):
+                    current_title = f"{current_title} -> {text.strip()}"
+                else:
+                    chunks.append((current_title, "[No content detected after this header.]"))
+                    current_title = text.strip()
+                    current_content = ""
+        else:
+            current_content += text + "\n"
+            content_started = True
+
+    if current_title:
+        content_to_save = current_content.strip()
+        if len(content_to_save) < 10:
+            content_to_save = "[No content detected after this header.]"
+        chunks.append((current_title, content_to_save))
+    return chunks
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    args = parser.parse_args()
+
+    layouts = [page for pdf_path in sorted(glob.glob(os.path.join(RFP_DIR, "*.pdf"))) for page in extract_pages(pdf_path)]
+    pages = list(itertools.islice(itertools.cycle(layouts), args.pages))
+
+    def aggregate(page_blocks):
+        blocks, bold = [], False
+        for page in pages:
+            page_result, page_bold = page_blocks(page)
+            blocks.extend(page_result)
+            bold = bold or page_bold
+        return blocks, bold
+
+    def aggregate_current():
+        # Same font-name memo the extractor shares across a page range
+        bold_fonts = {}
+        return aggregate(lambda page: _page_blocks(page, bold_fonts))
+
+    (old_blocks, old_bold), old_agg_s, old_agg_mb = measure(aggregate, legacy_page_blocks)
+    (new_blocks, new_bold), new_agg_s, new_agg_mb = measure(aggregate_current)
+
+    # Long sections are where += concatenation hurts: also classify with every header removed
+    body_only = [block for block in old_blocks if len(block[2].split()) >= 15]
+    rows = [("aggregate", old_agg_s, new_agg_s, old_agg_mb, new_agg_mb, (old_blocks, old_bold) == (new_blocks, new_bold))]
+    for label, blocks in (("classify", old_blocks), ("classify-1-section", body_only)):
+        old_chunks, old_s, old_mb = measure(legacy_classify_blocks, blocks, old_bold)
+        new_chunks, new_s, new_mb = measure(classify_blocks, new_blocks if blocks is old_blocks else blocks, new_bold)
+        rows.append((label, old_s, new_s, old_mb, new_mb, old_chunks == new_chunks))
+
+    print(f"{len(pages)} pages, {len(old_blocks)} blocks")
+    print(f"{'stage':<20} {'legacy s':>9} {'current s':>10} {'speedup':>8} {'legacy MB':>10} {'current MB':>11} {'identical':>10}")
+    for label, old_s, new_s, old_mb, new_mb, same in rows:
+        print(f"{label:<20} {old_s:>9.3f} {new_s:>10.3f} {old_s / new_s:>7.2f}x {old_mb:>10.1f} {new_mb:>11.1f} {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Cross-tender corpus search latency as the corpus grows (synthetic unit vectors, no API calls).
+
+    python benchmarks/bench_corpus.py --sizes 10 100 1000 10000 --dim 256
+
+Use --dim 3072 to match text-embedding-3-large (needs ~12 KB of RAM per section). The corpus is
+persisted to a temporary directory, so add ms/doc includes writing the tender's shard.
+"""
+import argparse
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from corpus_index import CorpusIndex
+
+
+def random_unit(rng, n, dim):
+    x = rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--sections", type=int, default=40, help="Sections per tender")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp(prefix="bench-corpus-")
+    corpus = CorpusIndex(args.dim, directory=directory)
+    queries = random_unit(rng, args.queries, args.dim)
+    chunks = [(f"Section {i}", "synthetic") for i in range(args.sections)]
+
+    print(f"{'docs':>7} {'vectors':>9} {'add ms/doc':>11} {'all p50 ms':>11} {'all p95 ms':>11} {'subset p50 ms':>14}")
+    for size in sorted(args.sizes):
+        start = time.perf_counter()
+        added = 0
+        while len(corpus.docs) < size:
+            corpus.add_document(f"doc-{len(corpus.docs)}", chunks, random_unit(rng, args.sections, args.dim))
+            added += 1
+        add_ms = (time.perf_counter() - start) * 1000 / max(1, added)
+
+        all_times, subset_times = [], []
+        subset = [f"doc-{i}" for i in range(0, size, max(1, size // 10))][:10]
+        for q in queries:
+            t = time.perf_counter()
+            corpus.search(q, k_per_doc=2, max_docs=10)
+            all_times.append((time.perf_counter() - t) * 1000)
+            t = time.perf_counter()
+            corpus.search(q, k_per_doc=2, doc_ids=subset)
+            subset_times.append((time.perf_counter() - t) * 1000)
+
+        print(f"{size:>7} {len(corpus):>9} {add_ms:>11.2f} {np.percentile(all_times, 50):>11.2f} "
+              f"{np.percentile(all_times, 95):>11.2f} {np.percentile(subset_times, 50):>14.2f}")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
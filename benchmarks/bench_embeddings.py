@@ -0,0 +1,53 @@
+"""
+Embedding throughput across concurrency levels, against the local fake API.
+
+    python benchmarks/bench_embeddings.py --latency 0.2 --chunks 600
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_openai_server import start_server
+
+
+def synthetic_chunks(n: int):
+    paragraph = "The contractor shall provide managed IT services including helpdesk, monitoring and patching. "
+    return [(f"Section {i}", f"{i}: " + paragraph * (1 + i % 40)) for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, rate_limit_every=args.rate_limit_every)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    # Measure the API path, not the per-chunk cache
+    os.environ["EMBED_CACHE"] = "0"
+
+    import vector_store
+    from embedding_providers import get_embedding_provider
+
+    provider = get_embedding_provider()
+
+    chunks = synthetic_chunks(args.chunks)
+    print(f"{'workers':>8} {'batches':>8} {'seconds':>8} {'chunks/s':>10} {'tokens/s':>10}")
+    for workers in args.workers:
+        provider.concurrency = workers
+        stats = {}
+        vectors = vector_store.embed_texts(chunks, stats=stats)
+        assert vectors.shape[0] == len(chunks)
+        print(f"{workers:>8} {stats['batches']:>8} {stats['seconds']:>8.2f} "
+              f"{stats['chunks_per_s']:>10.1f} {stats['tokens_per_s']:>10.0f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
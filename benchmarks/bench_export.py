@@ -0,0 +1,79 @@
+"""
+PDF export time for large context sets: the previous per-answer file export vs in-memory
+rendering vs one combined report.
+
+    python benchmarks/bench_export.py --questions 30 --sections 10 --section-words 600
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fpdf import FPDF
+from pdf_exporter import render_response_pdf, render_report_pdf, FONT_PATH
+
+
+def legacy_export(question, answer, context_chunks, filename):
+    # What the exporter did before: add_font on every call, write response.pdf, re-open it for download
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font('Arial', '', FONT_PATH, uni=True)
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, f"Question:\n{question}\n\n", align='L')
+    pdf.multi_cell(0, 10, f"Answer:\n{answer}\n\n", align='L')
+    pdf.multi_cell(0, 10, "Context Used:\n", align='L')
+    for i, (title, content) in enumerate(context_chunks):
+        pdf.multi_cell(0, 10, f"\n---\nSection {i+1}: {title}\n", align='L')
+        pdf.multi_cell(0, 10, content, align='L')
+    pdf.output(filename)
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+def synthetic_items(n_questions: int, n_sections: int, section_words: int):
+    words = ("The supplier shall provide evidence of ISO 27001 certification, Cyber Essentials Plus and "
+             "public liability insurance of £10m — “per claim” — within 10 working days. ").split()
+    content = " ".join(words[i % len(words)] for i in range(section_words))
+    context = [(f"Section {j}: Requirements", content) for j in range(n_sections)]
+    return [(f"Question {i}?", f"Answer {i}: " + content[:600], context) for i in range(n_questions)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--section-words", type=int, default=600)
+    args = parser.parse_args()
+
+    items = synthetic_items(args.questions, args.sections, args.section_words)
+    # Warm the font cache so the first in-memory call is not charged for it
+    render_response_pdf("warm-up", "", [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        legacy_bytes = sum(len(legacy_export(q, a, c, os.path.join(tmp, "response.pdf"))) for q, a, c in items)
+        legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    memory_bytes = sum(len(render_response_pdf(q, a, c)) for q, a, c in items)
+    memory_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report_bytes = len(render_report_pdf(items, title="Qualification sheet"))
+    report_s = time.perf_counter() - start
+
+    print(f"{args.questions} answers x {args.sections} sections x {args.section_words} words")
+    print(f"{'mode':<28} {'seconds':>8} {'per answer ms':>14} {'output MB':>10}")
+    for label, seconds, size in (
+        ("legacy (file per answer)", legacy_s, legacy_bytes),
+        ("in-memory (per answer)", memory_s, memory_bytes),
+        ("report (one document)", report_s, report_bytes),
+    ):
+        print(f"{label:<28} {seconds:>8.2f} {1000 * seconds / args.questions:>14.1f} {size / 1024 / 1024:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
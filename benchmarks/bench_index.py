@@ -0,0 +1,95 @@
+"""
+Recall@k, memory and query latency per FAISS index type, measured against exact inner-product search.
+
+    python benchmarks/bench_index.py --n 20000 --dim 3072 --reduced-dims 1024 256
+    python benchmarks/bench_index.py --vectors my_embeddings.npy   # real text-embedding-3 vectors
+
+Reduced dimensions are simulated the way text-embedding-3 `dimensions` works: truncate, then re-normalise.
+Synthetic data is a Gaussian mixture, so truncation recall is pessimistic compared to real embeddings.
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+import vector_store
+from vector_store import make_index, normalize_rows
+
+
+def clustered_vectors(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray, k: int) -> float:
+    hits = sum(len(set(t[:k]) & set(f[:k])) for t, f in zip(truth, found))
+    return hits / (k * len(truth))
+
+
+def run(name, vectors, queries, truth, k, index_type):
+    start = time.perf_counter()
+    index = make_index(vectors, index_type)
+    build_s = time.perf_counter() - start
+
+    vector_store._apply_search_params(index)
+    latencies = []
+    found = []
+    for q in queries:
+        t = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - t) * 1000)
+        found.append(ids[0])
+    found = np.array(found)
+    print(f"{name:<22} {recall_at_k(truth, found, k):>9.3f} {index_bytes(index) / 2**20:>10.1f} "
+          f"{build_s:>9.2f} {np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--vectors", help=".npy of real embeddings to use instead of synthetic data")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["flat_ip", "sq_fp16", "hnsw", "ivfpq"])
+    parser.add_argument("--reduced-dims", type=int, nargs="*", default=[1024, 256])
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = normalize_rows(np.load(args.vectors))
+    else:
+        data = clustered_vectors(args.n + args.queries, args.dim)
+    vectors, queries = data[:-args.queries], data[-args.queries:]
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{vectors.shape[0]} vectors x {vectors.shape[1]} dims, recall@{args.k} vs exact flat_ip")
+    print(f"{'index':<22} {'recall':>9} {'memory MB':>10} {'build s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for index_type in args.types:
+        run(index_type, vectors, queries, truth, args.k, index_type)
+    for dims in args.reduced_dims:
+        if dims >= vectors.shape[1]:
+            continue
+        reduced = normalize_rows(vectors[:, :dims].copy())
+        reduced_queries = normalize_rows(queries[:, :dims].copy())
+        for index_type in ("flat_ip", "hnsw"):
+            run(f"{index_type}@{dims}", reduced, reduced_queries, truth, args.k, index_type)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Memory of many sessions exploring many tenders: the previous per-session file_cache vs the
+process-wide, byte-bounded IndexCache.
+
+    python benchmarks/bench_index_cache.py --tenders 20 --sessions 10 --touches 8 --budget-mb 64
+
+Synthetic tenders are written to a temporary artifact store. Each mode runs in a fresh
+subprocess; anon_mb is heap memory (what an OOM killer counts first), file_mb is memory-mapped
+index pages that the OS can drop under pressure.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+
+def _rss_mb() -> dict:
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                key, kb, _ = line.split()
+                values[key.rstrip(":")] = int(kb) / 1024
+    return {"anon_mb": round(values.get("RssAnon", 0), 1), "file_mb": round(values.get("RssFile", 0), 1)}
+
+
+def write_tenders(n_tenders: int, n_chunks: int, dimension: int) -> list:
+    import numpy as np
+    from vector_store import make_index, normalize_rows, embedding_model_id
+    from artifact_store import save_artifacts
+    from ingest_queue import _store_key
+
+    rng = np.random.default_rng(0)
+    hashes = []
+    for t in range(n_tenders):
+        file_hash = f"{t:032x}"
+        chunks = [(f"Section {i}", f"Tender {t} clause {i}: " + "supplier shall provide evidence " * 40)
+                  for i in range(n_chunks)]
+        vectors = normalize_rows(rng.standard_normal((n_chunks, dimension), dtype=np.float32))
+        save_artifacts(_store_key(file_hash), chunks, make_index(vectors), vectors, embedding_id=embedding_model_id())
+        hashes.append(file_hash)
+    return hashes
+
+
+def simulate(mode: str, hashes: list, sessions: int, touches: int, budget_mb: float) -> dict:
+    import faiss
+    from artifact_store import load_artifacts, _entry_dir, INDEX_FILE
+    from lexical_index import BM25Index
+    from vector_store import embedding_model_id
+    from index_cache import IndexCache
+    from ingest_queue import IngestQueue, _store_key
+
+    rng = random.Random(0)
+    queue = IngestQueue(workers=1, cache=IndexCache(int(budget_mb * 1024 * 1024)))
+    session_caches = [{} for _ in range(sessions)]
+    start = time.perf_counter()
+    for _ in range(touches):
+        for session in session_caches:
+            file_hash = rng.choice(hashes)
+            if mode == "shared":
+                doc = queue.document(file_hash)
+            else:
+                if file_hash not in session:
+                    # What each session kept before: its own chunks, heap index, vectors and BM25 index
+                    chunks, _, vectors = load_artifacts(_store_key(file_hash), embedding_id=embedding_model_id())
+                    index = faiss.read_index(os.path.join(_entry_dir(_store_key(file_hash)), INDEX_FILE))
+                    session[file_hash] = {"chunks": chunks, "index": index, "vectors": vectors.copy(),
+                                          "lexical": BM25Index(chunks)}
+                doc = session[file_hash]
+            doc["index"].search(doc["index"].reconstruct(0).reshape(1, -1), 10)
+    elapsed = time.perf_counter() - start
+    result = {"seconds": round(elapsed, 3), **_rss_mb()}
+    if mode == "shared":
+        stats = queue.cache.stats()
+        result.update(resident_mb=round(stats["resident_bytes"] / 1024 / 1024, 1),
+                      hit_rate=round(stats["hit_rate"], 3), evictions=stats["evictions"])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", choices=("per-session", "shared"))
+    parser.add_argument("--tenders", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=1000, help="Chunks per tender")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--touches", type=int, default=8, help="Tenders opened per session")
+    parser.add_argument("--budget-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    if args.child:
+        hashes = [f"{t:032x}" for t in range(args.tenders)]
+        print(json.dumps(simulate(args.child, hashes, args.sessions, args.touches, args.budget_mb)))
+        return
+
+    tmp = tempfile.mkdtemp(prefix="bench-index-cache-")
+    # Set before any src module is imported, here and in the child processes
+    os.environ.update(TENDER_CACHE_DIR=tmp, TENDER_CACHE_MAX_MB="100000", PERF_METRICS="0",
+                      EMBEDDING_PROVIDER="openai", EMBEDDING_DIMENSIONS=str(args.dimension), INDEX_TYPE="flat_ip")
+    write_tenders(args.tenders, args.chunks, args.dimension)
+
+    print(f"{args.tenders} tenders x {args.chunks} chunks x {args.dimension} dims; "
+          f"{args.sessions} sessions opening {args.touches} tenders each; budget {args.budget_mb:.0f} MB")
+    print(f"{'mode':<12} {'seconds':>8} {'anon MB':>8} {'file MB':>8} {'cache MB':>9} {'hit rate':>9} {'evictions':>10}")
+    for mode in ("per-session", "shared"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--tenders", str(args.tenders),
+             "--sessions", str(args.sessions), "--touches", str(args.touches), "--budget-mb", str(args.budget_mb)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        row = json.loads(out)
+        print(f"{mode:<12} {row['seconds']:>8.2f} {row['anon_mb']:>8.1f} {row['file_mb']:>8.1f} "
+              f"{row.get('resident_mb', '-'):>9} {row.get('hit_rate', '-'):>9} {row.get('evictions', '-'):>10}")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
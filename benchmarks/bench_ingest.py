@@ -0,0 +1,83 @@
+"""
+Ingest wall time and peak RSS: the old three-parse path vs the single-pass ingest.
+
+    python benchmarks/bench_ingest.py
+
+Each mode runs in a fresh subprocess so ru_maxrss reflects that mode alone.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+RFP_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "rfps")
+sys.path.insert(0, SRC_DIR)
+
+
+def run_legacy(pdf_path: str):
+    # What app.py did before: copy upload to a temp file, pdfplumber full text, whole-file md5, pdfminer chunking
+    import hashlib
+    import io
+    import tempfile
+    import pdfplumber
+    from visual_chunker import visual_chunk_pdf
+
+    upload = io.BytesIO(open(pdf_path, "rb").read())
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        tmp_file.write(upload.read())
+        rfp_path = tmp_file.name
+    with pdfplumber.open(rfp_path) as pdf:
+        "\n".join([page.extract_text() or "" for page in pdf.pages])
+    with open(rfp_path, "rb") as f:
+        hashlib.md5(f.read()).hexdigest()
+    chunks = visual_chunk_pdf(rfp_path)
+    os.remove(rfp_path)
+    return len(chunks)
+
+
+def run_single(pdf_path: str):
+    import io
+    from ingest import hash_stream, ingest_upload
+
+    upload = io.BytesIO(open(pdf_path, "rb").read())
+    file_hash = hash_stream(upload)
+    result = ingest_upload(upload, file_hash=file_hash)
+    result.full_text
+    return len(result.chunks)
+
+
+def child(mode: str, pdf_path: str):
+    start = time.perf_counter()
+    n_chunks = {"legacy": run_legacy, "single": run_single}[mode](pdf_path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024, "chunks": n_chunks}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"))
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'file':<40} {'mode':<7} {'seconds':>8} {'peak MB':>8} {'chunks':>7}")
+    for pdf_path in sorted(glob.glob(os.path.join(RFP_DIR, "*.pdf"))):
+        for mode in ("legacy", "single"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, pdf_path],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            row = json.loads(out)
+            print(f"{os.path.basename(pdf_path):<40} {mode:<7} {row['seconds']:>8.2f} "
+                  f"{row['peak_rss_mb']:>8.1f} {row['chunks']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Layout extraction speedup across process-pool sizes on data/rfps/*.pdf.
+
+    python benchmarks/bench_layout.py --workers 1 2 4 8 --repeat 10
+
+--repeat concatenates each sample N times (via pypdfium2, shipped with pdfplumber)
+to approximate a 200+ page tender.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from visual_chunker import extract_layout_blocks, count_pdf_pages
+
+RFP_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "rfps")
+
+
+def repeat_pdf(pdf_path: str, times: int, out_dir: str) -> str:
+    import pypdfium2 as pdfium
+
+    source = pdfium.PdfDocument(pdf_path)
+    merged = pdfium.PdfDocument.new()
+    for _ in range(times):
+        merged.import_pages(source)
+    out_path = os.path.join(out_dir, f"x{times}-{os.path.basename(pdf_path)}")
+    merged.save(out_path)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pdf_path in sorted(glob.glob(os.path.join(RFP_DIR, "*.pdf"))):
+            if args.repeat > 1:
+                pdf_path = repeat_pdf(pdf_path, args.repeat, tmp)
+            print(f"\n{os.path.basename(pdf_path)} ({count_pdf_pages(pdf_path)} pages)")
+            print(f"{'workers':>8} {'seconds':>8} {'speedup':>8} {'identical':>10}")
+
+            serial_time, serial_result = None, None
+            for workers in args.workers:
+                start = time.perf_counter()
+                result = extract_layout_blocks(pdf_path, workers=workers)
+                elapsed = time.perf_counter() - start
+                if serial_time is None:
+                    serial_time, serial_result = elapsed, result
+                print(f"{workers:>8} {elapsed:>8.2f} {serial_time / elapsed:>7.2f}x {str(result == serial_result):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+BM25 index size, build time and query latency on the sample RFPs (no API calls).
+
+    python benchmarks/bench_lexical.py --repeat 20
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ingest import ingest_pdf
+from lexical_index import BM25Index
+
+RFP_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "rfps")
+QUERIES = [
+    "What is the tender about?",
+    "What is the estimated contract value?",
+    "What are the contract dates?",
+    "Who is the contracting authority?",
+    "What are the eligibility requirements?",
+    "tender reference number",
+    "closing date for submissions",
+    "CPV code",
+    "ISO 27001",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1, help="Replicate each document's chunks N times")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'file':<34} {'chunks':>7} {'terms':>7} {'build ms':>9} {'traced KB':>10} {'p50 us':>8} {'p95 us':>8}")
+    for pdf_path in sorted(glob.glob(os.path.join(RFP_DIR, "*.pdf"))):
+        chunks = ingest_pdf(pdf_path).chunks * args.repeat
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = BM25Index(chunks)
+        build_ms = (time.perf_counter() - start) * 1000
+        traced_kb = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+
+        latencies = []
+        for _ in range(args.rounds):
+            for query in QUERIES:
+                t = time.perf_counter()
+                index.search(query, 10)
+                latencies.append((time.perf_counter() - t) * 1e6)
+
+        print(f"{os.path.basename(pdf_path):<34} {len(index):>7} {len(index._postings):>7} {build_ms:>9.1f} "
+              f"{traced_kb:>10.0f} {np.percentile(latencies, 50):>8.0f} {np.percentile(latencies, 95):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+End-to-end pipeline benchmark with regression checks against a stored baseline.
+
+    python benchmarks/bench_pipeline.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py                      # compare; exits 1 on regression, 2 without a baseline
+
+Runs layout extraction, classification, embedding, index build, search, prompt build,
+chat and PDF export over data/rfps/*.pdf plus synthetic large PDFs (each sample repeated
+--repeat times). Embeddings and chat go to the local fake API with --latency seconds per
+request, so results are deterministic and offline. Each document runs --runs times, each
+in a fresh subprocess, and each stage keeps its fastest run so one noisy run does not read as a
+regression; peak_rss_mb is the process high-water mark after each stage. Every run also times a
+fixed pure-Python reference loop, and stage times are compared relative to it, so a slower or
+busier host does not read as a code regression.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+RFP_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "rfps")
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+sys.path.insert(0, SRC_DIR)
+
+STAGES = ("layout", "classify", "embed", "index", "search", "prompt", "chat", "export")
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def reference_seconds(repeats: int = 5) -> float:
+    """
+    Best-of time of a fixed CPU-bound loop, the unit host speed is measured in
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        total = 0
+        for i in range(500_000):
+            total += i * i % 7
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_pipeline(pdf_path: str, n_questions: int) -> dict:
+    from visual_chunker import extract_page_records, chunk_pages
+    from context_packer import split_oversized_sections, pack_context
+    from vector_store import embed_texts, make_index, embed_query, hybrid_search_ids
+    from lexical_index import BM25Index
+    from prompts import build_rag_prompt
+    from chat import stream_chat_answer
+    from pdf_exporter import render_response_pdf
+    from batch import load_questions
+
+    questions = load_questions()[:n_questions]
+    results = {}
+    reference = reference_seconds()
+
+    def record(stage, start, items, unit):
+        elapsed = time.perf_counter() - start
+        results[stage] = {
+            "seconds": round(elapsed, 4),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "items": items,
+            "unit": unit,
+            "per_s": round(items / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    start = time.perf_counter()
+    pages = extract_page_records(pdf_path)
+    record("layout", start, len(pages), "pages")
+
+    start = time.perf_counter()
+    chunks = split_oversized_sections(chunk_pages(pages, pdf_path))
+    record("classify", start, len(pages), "pages")
+
+    start = time.perf_counter()
+    vectors = embed_texts(chunks)
+    record("embed", start, len(chunks), "chunks")
+
+    start = time.perf_counter()
+    index = make_index(vectors)
+    lexical = BM25Index(chunks)
+    record("index", start, len(chunks), "chunks")
+
+    start = time.perf_counter()
+    retrieved = [[chunks[i] for i in hybrid_search_ids(q, index, lexical, query_vector=embed_query(q))] for q in questions]
+    record("search", start, len(questions), "queries")
+
+    start = time.perf_counter()
+    contexts = [pack_context(top) for top in retrieved]
+    prompts = [build_rag_prompt(context, q) for context, q in zip(contexts, questions)]
+    record("prompt", start, len(questions), "prompts")
+
+    start = time.perf_counter()
+    answers = ["".join(stream_chat_answer(prompt, 0.2)) for prompt in prompts]
+    record("chat", start, len(questions), "answers")
+
+    start = time.perf_counter()
+    for q, answer, context in zip(questions, answers, contexts):
+        render_response_pdf(q, answer, context)
+    record("export", start, len(questions), "pdfs")
+    results["reference_s"] = round(min(reference, reference_seconds()), 5)
+    return results
+
+
+def best_of(runs: list) -> dict:
+    """
+    Per stage, the fastest of several runs of one document (and the lowest memory high-water mark)
+    """
+    best = {"reference_s": min(run["reference_s"] for run in runs)}
+    for stage in STAGES:
+        rows = [run[stage] for run in runs]
+        row = dict(min(rows, key=lambda r: r["seconds"]))
+        row["peak_rss_mb"] = min(r["peak_rss_mb"] for r in rows)
+        best[stage] = row
+    return best
+
+
+# ------------------------------------------
+# Baseline comparison
+# ------------------------------------------
+def compare(current: dict, baseline: dict, time_threshold: float, memory_threshold: float, min_seconds: float) -> list:
+    """
+    Returning (doc, stage, metric, baseline, current) for every stage slower or larger than its threshold.
+    Current times are first rescaled by how fast this host ran the reference loop compared with the baseline's.
+    """
+    regressions = []
+    for doc, stages in current.items():
+        base_stages = baseline.get(doc, {})
+        host_speed = 1.0
+        if stages.get("reference_s") and base_stages.get("reference_s"):
+            host_speed = stages["reference_s"] / base_stages["reference_s"]
+        for stage in STAGES:
+            row, base = stages.get(stage), base_stages.get(stage)
+            if row is None or base is None:
+                continue
+            seconds = round(row["seconds"] / host_speed, 4)
+            # Absolute floor keeps millisecond-scale stages from flagging on timer noise
+            if seconds > base["seconds"] * (1 + time_threshold) and seconds - base["seconds"] > min_seconds:
+                regressions.append((doc, stage, "seconds", base["seconds"], seconds))
+            if row["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_threshold):
+                regressions.append((doc, stage, "peak_rss_mb", base["peak_rss_mb"], row["peak_rss_mb"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", nargs=2, metavar=("PDF", "QUESTIONS"))
+    parser.add_argument("--repeat", type=int, default=10, help="Synthetic large PDFs: each sample repeated N times (0 = none)")
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per document; each stage keeps its fastest")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake API seconds per request")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Fake API seconds per streamed chunk")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 = +25%%")
+    parser.add_argument("--memory-threshold", type=float, default=0.20)
+    parser.add_argument("--min-seconds", type=float, default=0.1, help="Slowdowns smaller than this are timer noise")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_pipeline(args.child[0], int(args.child[1]))))
+        return
+
+    from fake_openai_server import start_server
+    from visual_chunker import count_pdf_pages
+    from bench_layout import repeat_pdf
+
+    server, base_url = start_server(latency=args.latency, token_latency=args.token_latency)
+    tmp = tempfile.mkdtemp(prefix="bench-pipeline-")
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=base_url,
+        OPENAI_API_KEY="fake",
+        EMBEDDING_PROVIDER="openai",
+        # Every run pays for its embeddings; nothing is served from earlier runs
+        EMBED_CACHE="0",
+        LAYOUT_WORKERS="1",
+    )
+
+    try:
+        pdf_paths = sorted(glob.glob(os.path.join(RFP_DIR, "*.pdf")))
+        if args.repeat > 1:
+            pdf_paths += [repeat_pdf(path, args.repeat, tmp) for path in list(pdf_paths)]
+
+        current = {}
+        for pdf_path in pdf_paths:
+            name = os.path.basename(pdf_path)
+            runs = []
+            for _ in range(max(1, args.runs)):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", pdf_path, str(args.questions)],
+                    capture_output=True, text=True, check=True, env=env,
+                ).stdout.strip().splitlines()[-1]
+                runs.append(json.loads(out))
+            current[name] = best_of(runs)
+            print(f"\n{name} ({count_pdf_pages(pdf_path)} pages; reference loop {current[name]['reference_s'] * 1000:.1f} ms)")
+            print(f"{'stage':<10} {'seconds':>9} {'peak MB':>8} {'items':>7} {'per second':>16}")
+            for stage in STAGES:
+                row = current[name][stage]
+                print(f"{stage:<10} {row['seconds']:>9.3f} {row['peak_rss_mb']:>8.1f} {row['items']:>7} "
+                      f"{row['per_s'] or 0:>9.1f} {row['unit']:<7}")
+    finally:
+        # The repeated PDFs are large; nothing is left behind in the temp dir
+        shutil.rmtree(tmp, ignore_errors=True)
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        # A check with nothing to compare against must not pass silently
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first.")
+        sys.exit(2)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.time_threshold, args.memory_threshold, args.min_seconds)
+    if not regressions:
+        print(f"\nNo regressions against {args.baseline}.")
+        return
+    print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+    for doc, stage, metric, before, after in regressions:
+        print(f"  {doc} / {stage}: {metric} {before} -> {after} ({after / before - 1:+.0%})")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Time until a freshly uploaded tender can be searched: one-pass ingestion vs progressive ingestion,
+against the local fake API.
+
+    python benchmarks/bench_progressive.py --latency 0.2 --repeat 5
+
+Runs over data/rfps/*.pdf; --repeat also adds each sample merged with itself N times. first_s is
+when the first sections become searchable (one-pass: when the whole tender is ready), ready_s
+when the stored index is complete.
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_openai_server import start_server
+from bench_layout import repeat_pdf
+
+RFP_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "rfps")
+
+
+def run(queue, pdf_path: str, label: str) -> dict:
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    # A distinct key per mode, so the second run does not find the first one's artifacts
+    job = queue.submit(io.BytesIO(data), os.path.basename(pdf_path), file_hash=f"{label}-{time.time_ns()}")
+    start = time.perf_counter()
+    first = None
+    while not job.wait(0.01):
+        if first is None and job.preview() is not None:
+            first = time.perf_counter() - start
+    ready = time.perf_counter() - start
+    if job.error:
+        raise RuntimeError(job.error)
+    return {"first_s": first if first is not None else ready, "ready_s": ready, "sections": job.sections}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency)
+    tmp = tempfile.mkdtemp(prefix="bench-progressive-")
+    # Set before any src module is imported; every section is sent to the API in both modes
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "fake"), EMBED_CACHE="0",
+                      TENDER_CACHE_DIR=os.path.join(tmp, "artifacts"), PERF_METRICS="0")
+
+    import ingest_queue
+
+    queue = ingest_queue.IngestQueue(workers=1)
+    pdf_paths = sorted(glob.glob(os.path.join(RFP_DIR, "*.pdf")))
+    if args.repeat > 1:
+        pdf_paths += [repeat_pdf(path, args.repeat, tmp) for path in list(pdf_paths)]
+
+    rows = []
+    for pdf_path in pdf_paths:
+        for mode, progressive in (("one-pass", False), ("progressive", True)):
+            ingest_queue.PROGRESSIVE_INGEST = progressive
+            rows.append((os.path.basename(pdf_path), mode, run(queue, pdf_path, mode)))
+
+    print(f"{'file':<40} {'mode':<12} {'first_s':>8} {'ready_s':>8} {'sections':>9}")
+    for name, mode, row in rows:
+        print(f"{name:<40} {mode:<12} {row['first_s']:>8.2f} {row['ready_s']:>8.2f} {row['sections']:>9}")
+
+    queue.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Deterministic local stand-in for the OpenAI HTTP API, used by the benchmarks.
+
+Point the app or a benchmark at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake
+
+Run standalone:
+    python benchmarks/fake_openai_server.py --port 8765 --latency 0.2 --rate-limit-every 7
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_DIMENSIONS = 3072
+
+
+def fake_embedding(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> list:
+    """
+    Same text -> same unit vector, so runs are reproducible
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    # Set on the server instance by start_server()
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _should_rate_limit(self) -> bool:
+        config = self.server.config
+        with config["lock"]:
+            config["requests"] += 1
+            every = config["rate_limit_every"]
+            return bool(every) and config["requests"] % every == 0
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if self._should_rate_limit():
+            self._send_json(429, {"error": {"message": "Rate limit reached (fake)", "type": "rate_limit"}},
+                            headers={"retry-after": "0.05"})
+            return
+
+        if config["latency"]:
+            time.sleep(config["latency"])
+
+        if self.path.rstrip("/").endswith("/embeddings"):
+            self._handle_embeddings(request)
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            self._handle_chat(request)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _handle_embeddings(self, request: dict):
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(request.get("dimensions") or DEFAULT_DIMENSIONS)
+        with self.server.config["lock"]:
+            self.server.config["embedding_inputs"] += len(inputs)
+        data = [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(max(1, len(text) // 4) for text in inputs)
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": request.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+
+    def _handle_chat(self, request: dict):
+        config = self.server.config
+        prompt = "".join(str(m.get("content", "")) for m in request.get("messages", []))
+        # Deterministic answer derived from the prompt, split into word "tokens"
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        words = f"Fake answer {digest}: the document states the requested information in its context sections.".split(" ")
+        tokens = [w if i == 0 else " " + w for i, w in enumerate(words)]
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": len(tokens),
+            "total_tokens": max(1, len(prompt) // 4) + len(tokens),
+        }
+        base = {"id": f"chatcmpl-{digest}", "created": int(time.time()), "model": request.get("model", "fake-chat")}
+
+        if not request.get("stream"):
+            self._send_json(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        def send_event(payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        for token in tokens:
+            if config["token_latency"]:
+                time.sleep(config["token_latency"])
+            send_event({**base, "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+        send_event({**base, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send_event({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(port: int = 0, latency: float = 0.0, rate_limit_every: int = 0, token_latency: float = 0.0):
+    """
+    Starting the fake server on a background thread; returns (server, base_url)
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = {
+        "latency": latency,
+        "token_latency": token_latency,
+        "rate_limit_every": rate_limit_every,
+        "requests": 0,
+        "embedding_inputs": 0,
+        "lock": threading.Lock(),
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI API for offline benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Return 429 on every Nth request")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds between streamed chat tokens")
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.port, args.latency, args.rate_limit_every, args.token_latency)
+    print(f"Fake OpenAI API listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,130 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+# Cosine similarity above which a different wording of a cached question reuses its answer; > 1 disables
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+def answer_key(file_hash: str, query: str, chunk_ids: List[int],
+               prompt_version: str, model: str, temperature: float) -> str:
+    """
+    Hashing everything that determines the generated answer
+    """
+    raw = "|".join([
+        file_hash,
+        normalize_query(query),
+        ",".join(str(i) for i in chunk_ids),
+        prompt_version,
+        model,
+        f"{temperature:.3f}",
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def answer_scope(file_hash: str, prompt_version: str, model: str, temperature: float) -> tuple:
+    # Semantic reuse is only allowed between queries on the same document and generation settings
+    return (file_hash, prompt_version, model, round(temperature, 3))
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU + TTL cache of generated answers with optional near-duplicate query reuse
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return now - entry["created"] > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Tuple[str, list]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["answer"], entry["top_chunks"]
+
+    def get_similar(self, scope: tuple, query_vector: Optional[np.ndarray]) -> Optional[Tuple[str, list]]:
+        if self.similarity_threshold > 1 or query_vector is None:
+            return None
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        now = time.time()
+        best_key, best_score = None, self.similarity_threshold
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry["scope"] != scope or entry["query_vector"] is None or self._expired(entry, now):
+                    continue
+                score = float(np.dot(entry["query_vector"], query))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            entry = self._entries[best_key]
+            return entry["answer"], entry["top_chunks"]
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key: str, scope: tuple, query_vector: Optional[np.ndarray], answer: str, top_chunks: list) -> None:
+        # Keyword-only retrieval has no query embedding; such entries only serve exact hits
+        vector = None
+        if query_vector is not None:
+            vector = np.asarray(query_vector, dtype=np.float32).ravel()
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._entries[key] = {
+                "scope": scope,
+                "query_vector": vector,
+                "answer": answer,
+                "top_chunks": top_chunks,
+                "created": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
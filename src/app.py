@@ -1,25 +1,25 @@
 import streamlit as st
 import os
-import tempfile
-import pdfplumber
-from openai import OpenAI
+from contextlib import nullcontext
 from dotenv import load_dotenv
-from visual_chunker import visual_chunk_pdf, show_font_debug_view
-from vector_store import build_faiss_index, search_faiss_index
-from prompts import build_rag_prompt
-from pdf_exporter import export_response_to_pdf
-import hashlib
+from visual_chunker import show_font_debug_view
+from ingest import hash_stream
+from ingest_queue import IngestQueue
+from vector_store import embed_query, hybrid_search_ids, embedding_model_id, RETRIEVAL_MODE, RETRIEVAL_MODES
+from prompts import build_rag_prompt, PROMPT_TEMPLATE_VERSION
+from context_packer import pack_context, CONTEXT_TOKEN_BUDGET
+from tokens import count_tokens
+from chat import stream_chat_answer, CHAT_MODEL
+from answer_cache import AnswerCache, answer_key, answer_scope
+from corpus_index import load_or_create_corpus
+from pdf_exporter import render_response_pdf, render_report_pdf
+from perf import span, count, stage_rows, recorder, PERF_ENABLED
 
 
 
 
 try:
     load_dotenv()
-    def get_file_hash(file_path):
-        with open(file_path, "rb") as f:
-            return hashlib.md5(f.read()).hexdigest()
-
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
     st.set_page_config(page_title="Tender Intelligence", layout="wide")
     
@@ -60,6 +60,13 @@ try:
 
         st.markdown("#### ⚙️ Model Settings")
         temperature = st.slider("🎛️ Response Creativity", 0.0, 2.0, 0.2, 0.2)
+        retrieval_mode = st.radio(
+            "🔍 Retrieval Mode",
+            RETRIEVAL_MODES,
+            index=RETRIEVAL_MODES.index(RETRIEVAL_MODE),
+            format_func={"semantic": "Semantic", "hybrid": "Hybrid (semantic + keyword)", "keyword": "Keyword only (fastest)"}.get,
+            help="Keyword mode skips the embedding call; good for exact lookups like reference numbers or CPV codes."
+        )
 
         st.markdown("#### 📝 Instructions")
         st.markdown(
@@ -143,9 +150,60 @@ try:
         st.warning("📂 Please upload at least one tender to begin.")
         st.stop()
 
+    # Cross-tender corpus, shared by every session and persisted between restarts
+    @st.cache_resource
+    def get_corpus(dimension, embedding_id):
+        return load_or_create_corpus(dimension, embedding_id)
+
+    # One answer cache per process, shared by every session
+    @st.cache_resource
+    def get_answer_cache():
+        return AnswerCache()
+
+    # One ingestion pool per process: every upload, from any session, is indexed in the background
+    @st.cache_resource
+    def get_ingest_queue():
+        def add_to_corpus(job, chunks, index, vectors):
+            corpus = get_corpus(index.d, embedding_model_id())
+            if job.file_hash not in corpus.docs:
+                # Persists only this tender's shard, not the whole corpus
+                corpus.add_document(job.file_hash, chunks, vectors, name=job.name)
+        return IngestQueue(on_ready=add_to_corpus)
+
+    # Every upload starts processing now, not when it is selected; known hashes are not queued twice
+    ingest_queue = get_ingest_queue()
+    upload_hashes = st.session_state.setdefault("upload_hashes", {})
+    jobs = {}
+    for uploaded in uploaded_files:
+        # Hashing each upload once per session rather than on every rerun
+        if uploaded.file_id not in upload_hashes:
+            upload_hashes[uploaded.file_id] = hash_stream(uploaded)
+        jobs[uploaded.name] = ingest_queue.submit(uploaded, uploaded.name, file_hash=upload_hashes[uploaded.file_id])
+
     # Create dropdown to select which file to process
     file_names = [f.name for f in uploaded_files]
     selected_name = st.selectbox("Choose a tender to explore", file_names)
+    selected_job = jobs[selected_name]
+    selected_was_done = selected_job.done
+    selected_had_preview = selected_job.preview() is not None
+    all_were_done = all(job.done for job in jobs.values())
+
+    # Per-file progress, polled while anything is still being prepared
+    @st.fragment(run_every=1.0 if not all_were_done else None)
+    def ingestion_status():
+        ready = sum(job.status == "ready" for job in jobs.values())
+        with st.expander(f"📥 Processing uploads ({ready}/{len(jobs)} ready)", expanded=ready < len(jobs)):
+            for name, job in jobs.items():
+                label = f"{name} · {job.status} ({job.seconds:.0f}s)" + (f": {job.error}" if job.error else "")
+                st.progress(job.progress, text=label)
+        # Redrawing the page once the selected tender is searchable or done, or the last pending one is done;
+        # failed jobs stay done, so a page that started with every job done never reruns itself
+        if ((selected_job.done and not selected_was_done)
+                or (not selected_had_preview and selected_job.preview() is not None)
+                or (not all_were_done and all(job.done for job in jobs.values()))):
+            st.rerun()
+
+    ingestion_status()
 
     # Get the actual file object by matching name
     selected_file = next((f for f in uploaded_files if f.name == selected_name), None)
@@ -164,15 +222,7 @@ try:
                 st.info("⚙️ No tender uploaded. Using demo tender for demo purposes.")
 
     if selected_file:
-        # Save uploaded file temporarily
         st.markdown(f"📁 **Selected File:** `{selected_file.name}`")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            tmp_file.write(selected_file.read())
-            rfp_path = tmp_file.name
-
-        # Extract text
-        with pdfplumber.open(rfp_path) as pdf:
-            extracted_text = "\n".join([page.extract_text() or "" for page in pdf.pages])
 
         # Font size debug view
         # if st.checkbox("🪵 Show Font Size Debug View"):
@@ -180,40 +230,60 @@ try:
 
 
 
-        file_hash = get_file_hash(rfp_path)
-
-        @st.cache_data(show_spinner="📑 Chunking tender document...")
-        def cached_chunker(file_hash, pdf_path):
-            return visual_chunk_pdf(pdf_path)
-
-        @st.cache_resource(show_spinner="📦 Building semantic index...")
-        def cached_index(chunks):
-            return build_faiss_index(chunks)
-
-
-        if "file_cache" not in st.session_state:
-            st.session_state.file_cache = {}
-
-        if file_hash not in st.session_state.file_cache:
-            with st.spinner("🔍 Processing tender..."):
-                chunks = cached_chunker(file_hash,rfp_path)
-                index, vectors = cached_index(chunks)
-                st.session_state.file_cache[file_hash] = {
-                    "chunks": chunks,
-                    "index": index,
-                    "vectors": vectors,
-                    "name": selected_name
-                }
+        file_hash = selected_job.file_hash
+        if selected_job.status == "failed":
+            # The job stays failed across reruns; it is only processed again when asked to
+            st.error(f"❌ Could not process this tender: {selected_job.error}")
+            if st.button("🔁 Retry", key=f"retry_{file_hash}"):
+                ingest_queue.submit(selected_file, selected_name, file_hash=file_hash, retry=True)
+                st.rerun()
+            st.stop()
+        partial = not selected_job.done
+        if partial:
+            # Sections embedded so far, searchable while the rest of the tender is still being parsed
+            doc = selected_job.preview()
+            if doc is None:
+                st.info("⏳ This tender is still being indexed; the page updates when it is ready. "
+                        "The other uploads keep processing in the background.")
+                st.stop()
         else:
-            chunks = st.session_state.file_cache[file_hash]["chunks"]
-            index = st.session_state.file_cache[file_hash]["index"]
-            # vectors = st.session_state.file_cache[file_hash]["vectors"]
-            # selected_name = st.session_state.file_cache[file_hash]["name"]
+            # Prepared once per process and shared by every session that selects the same file;
+            # the memory-bounded cache reloads it from the artifact store if it has been evicted
+            doc = ingest_queue.document(file_hash)
+            if doc is None:
+                st.error("❌ This tender's index is no longer available; please upload it again.")
+                st.stop()
+        chunks = doc["chunks"]
+        index = doc["index"]
+        lexical = doc["lexical"]
+        embed_stats = selected_job.embed_stats
+        dedup_stats = selected_job.dedup_stats
+
+        corpus = get_corpus(index.d, embedding_model_id())
         
         # Chunking
         st.markdown("### 📑 Parsed Sections of the Tender", unsafe_allow_html=True)
         st.markdown("<hr style='border: 1px solid #CCC;'>", unsafe_allow_html=True)
 
+        # Coverage of a tender still streaming; the sections below are those indexed when the page was drawn
+        if partial:
+            @st.fragment(run_every=1.0)
+            def coverage():
+                preview = selected_job.preview()
+                if preview is None:
+                    st.rerun()
+                total_pages = max(selected_job.total_pages, preview["pages"], 1)
+                st.progress(
+                    min(1.0, preview["pages"] / total_pages),
+                    text=f"⏳ Indexed {preview['pages']}/{total_pages} pages · {len(preview['chunks'])} sections so far "
+                         f"— answers use the indexed part only",
+                )
+                new_sections = len(preview["chunks"]) - len(chunks)
+                if new_sections > 0 and st.button(f"Show {new_sections} newly indexed sections"):
+                    st.rerun()
+
+            coverage()
+
         for i, (title, content) in enumerate(chunks):
             preview = title if title else content[:40]
             with st.expander(f"📄 {preview} (Section {i+1})"):
@@ -225,7 +295,20 @@ try:
         st.markdown("We are building a semantic index of the document using OpenAI embeddings and FAISS.")
 
         #index, vectors = cached_index(chunks)
-        st.success(f"Indexed {len(chunks)} chunks.")
+        if not partial:
+            st.success(f"Indexed {len(chunks)} chunks.")
+        if dedup_stats.get("tokens_removed"):
+            st.caption(
+                f"Boilerplate removed before embedding: {dedup_stats.get('boilerplate_blocks', 0)} repeated "
+                f"header/footer blocks and {dedup_stats['duplicate_chunks']} duplicate sections, "
+                f"{dedup_stats['tokens_removed']:,} tokens."
+            )
+        if embed_stats.get("chunks"):
+            st.caption(
+                f"Embedding cache: {embed_stats['cache_hit_rate']:.0%} of chunks reused, "
+                f"{embed_stats['cache_tokens_saved']:,} API tokens saved; "
+                f"{embed_stats['duplicate_chunks']} repeated sections sent once."
+            )
 
 
         # Ask a question
@@ -244,24 +327,27 @@ try:
 
 
         if user_query:
-            with st.spinner("🔎 Searching the semantic index..."):
-                top_chunks = search_faiss_index(user_query, index, chunks)
-
-            # LLM prompt
-            prompt = build_rag_prompt(top_chunks, user_query)
-
-            with st.spinner("Thinking..."):
-                response = client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature= temperature,
-                )
-                final_answer = response.choices[0].message.content
+            with st.spinner("🔎 Searching the semantic index..."), span("retrieval", mode=retrieval_mode):
+                query_vector = embed_query(user_query) if retrieval_mode != "keyword" else None
+                # A streaming tender's index grows under this lock; ids past this snapshot's chunks are skipped
+                with doc.get("lock") or nullcontext():
+                    top_ids = hybrid_search_ids(user_query, index, lexical, mode=retrieval_mode, query_vector=query_vector)
+                top_ids = [i for i in top_ids if i < len(chunks)]
+                top_chunks = [chunks[i] for i in top_ids]
+
+            # Reruns (widget clicks, downloads) and near-identical questions reuse the stored answer
+            answer_cache = get_answer_cache()
+            prompt_version = f"{PROMPT_TEMPLATE_VERSION}:budget{CONTEXT_TOKEN_BUDGET}"
+            # Answers over part of a tender are not reused once more of it, or all of it, is indexed
+            answer_id = f"{file_hash}:partial{len(chunks)}" if partial else file_hash
+            cache_key = answer_key(answer_id, user_query, top_ids, prompt_version, CHAT_MODEL, temperature)
+            cache_scope = answer_scope(answer_id, prompt_version, CHAT_MODEL, temperature)
+            cached_answer = answer_cache.get(cache_key) or answer_cache.get_similar(cache_scope, query_vector)
 
             # Display answer
             st.markdown("### 🧠 Assistant Response")
 
-            st.markdown(f"""
+            answer_box = """
                 <div style='
                     background-color: #f0f8ff;
                     border-left: 6px solid #4A90E2;
@@ -271,8 +357,53 @@ try:
                     font-size: 1rem;
                     line-height: 1.6;
                 '>
-            {final_answer}</div>
-            """, unsafe_allow_html=True)
+            {}</div>
+            """
+
+            count("answer_cache_hits" if cached_answer is not None else "answer_cache_misses")
+            if cached_answer is not None:
+                final_answer, top_chunks = cached_answer
+                st.markdown(answer_box.format(final_answer), unsafe_allow_html=True)
+                cache_stats = answer_cache.stats()
+                st.caption(
+                    f"⚡ Cached answer · cache hit rate {cache_stats['hit_rate']:.0%} "
+                    f"({cache_stats['hits']} exact, {cache_stats['semantic_hits']} similar, {cache_stats['misses']} misses)"
+                )
+            else:
+                answer_cache.record_miss()
+
+                # Packing deduplicated, diverse sections into the context token budget
+                pack_stats = {}
+                with span("prompt_build"):
+                    top_chunks = pack_context(top_chunks, stats=pack_stats)
+
+                    # LLM prompt
+                    prompt = build_rag_prompt(top_chunks, user_query)
+                    prompt_tokens = count_tokens(prompt)
+                count("prompt_tokens", prompt_tokens)
+                print(f"[Prompt] {prompt_tokens} prompt tokens; {pack_stats['packed']}/{pack_stats['retrieved']} sections, "
+                      f"{pack_stats['near_duplicates']} near-duplicates dropped, "
+                      f"{pack_stats['context_tokens']}/{pack_stats['token_budget']} context tokens")
+
+                # Streaming tokens into the response box as they arrive
+                answer_placeholder = st.empty()
+                answer_placeholder.markdown(answer_box.format("Thinking..."), unsafe_allow_html=True)
+                query_metrics = {}
+                final_answer = ""
+                for delta in stream_chat_answer(prompt, temperature, metrics=query_metrics):
+                    final_answer += delta
+                    answer_placeholder.markdown(answer_box.format(final_answer + "▌"), unsafe_allow_html=True)
+                answer_placeholder.markdown(answer_box.format(final_answer), unsafe_allow_html=True)
+                answer_cache.put(cache_key, cache_scope, query_vector, final_answer, top_chunks)
+
+                if "query_metrics" not in st.session_state:
+                    st.session_state.query_metrics = []
+                st.session_state.query_metrics.append({"query": user_query, "prompt_tokens": prompt_tokens, **query_metrics})
+                st.session_state.query_metrics = st.session_state.query_metrics[-50:]
+                st.caption(
+                    f"⏱️ First token in {query_metrics['ttft_s']:.2f}s · "
+                    f"total {query_metrics['total_s']:.2f}s · {prompt_tokens} prompt / {query_metrics['output_tokens']} output tokens"
+                )
             # st.markdown(final_answer, unsafe_allow_html=True)
             # st.markdown("</div>", unsafe_allow_html=True)
 
@@ -304,17 +435,75 @@ try:
 
 
 
-            # Export
+            # Every answer given for this tender in this session, for the combined report
+            answered = st.session_state.setdefault("answered", {}).setdefault(file_hash, {})
+            answered[user_query] = (final_answer, top_chunks)
+
+            # Export (rendered in memory, so concurrent users never share a file)
             st.markdown("### 📝 Export")
             if st.button("📤 Download Answer as PDF"):
-                filename = export_response_to_pdf(user_query, final_answer, top_chunks)
-                with open(filename, "rb") as f:
-                    st.download_button(
-                        label="Download PDF",
-                        data=f,
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
+                st.download_button(
+                    label="Download PDF",
+                    data=render_response_pdf(user_query, final_answer, top_chunks),
+                    file_name="response.pdf",
+                    mime="application/pdf"
+                )
+            if len(answered) > 1 and st.button(f"📚 Download Report of All {len(answered)} Answers"):
+                st.download_button(
+                    label="Download Report",
+                    data=render_report_pdf(
+                        [(question, answer, context) for question, (answer, context) in answered.items()],
+                        title=selected_name
+                    ),
+                    file_name="tender_report.pdf",
+                    mime="application/pdf"
+                )
+
+        # Search across every tender indexed so far (this and other sessions, plus historical ones)
+        st.subheader("🗂️ Search Across All Tenders")
+        corpus_query = st.text_input("Find tenders mentioning...", placeholder="e.g. ISO 27001 certification required")
+        corpus_names = {doc_id: doc["name"] for doc_id, doc in corpus.docs.items()}
+        corpus_filter = st.multiselect(
+            "Limit to tenders (optional)", list(corpus_names), format_func=lambda doc_id: corpus_names[doc_id]
+        )
+        if corpus_query:
+            with st.spinner("🔎 Searching all tenders..."), span("corpus_search"):
+                corpus_results = corpus.search(
+                    embed_query(corpus_query), k_per_doc=2, doc_ids=corpus_filter or None, max_docs=10
+                )
+            st.caption(f"{len(corpus)} sections across {len(corpus.docs)} tenders searched.")
+            for doc in corpus_results:
+                with st.expander(f"📄 {doc['name']} (relevance {doc['score']:.2f})"):
+                    for section in doc["sections"]:
+                        st.markdown(f"**{section['title']}**")
+                        st.markdown(f"<div style='background-color:#f9f9f9;padding:10px;border-radius:8px;'>{section['content'][:600]}</div>", unsafe_allow_html=True)
+
+    # Performance panel, drawn last so it includes this run's stages
+    if PERF_ENABLED:
+        with st.sidebar.expander("⏱️ Performance"):
+            rows = stage_rows()
+            if rows:
+                st.dataframe(rows, hide_index=True, use_container_width=True)
+            else:
+                st.caption("No stages timed yet.")
+            snapshot = recorder.snapshot()
+            counters = {**snapshot["counters"], **snapshot["gauges"]}
+            if counters:
+                st.markdown("**Counters**")
+                st.dataframe(
+                    [{"counter": name, "value": value} for name, value in sorted(counters.items())],
+                    hide_index=True, use_container_width=True
+                )
+            cache_stats = get_ingest_queue().cache.stats()
+            st.caption(
+                f"Index cache: {cache_stats['entries']} tenders, "
+                f"{cache_stats['resident_bytes'] / 1024 / 1024:.1f}/{cache_stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+                f"hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['evictions']} evictions"
+            )
+            st.download_button("Export JSON lines", recorder.to_json_lines(),
+                               file_name="tender_perf.jsonl", mime="application/x-ndjson")
+            st.download_button("Export Prometheus", recorder.to_prometheus(),
+                               file_name="tender_perf.prom", mime="text/plain")
 
 except Exception as e:
     st.error(f"An error occurred: {e}")
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from typing import List, Tuple, Optional
+
+import faiss
+import numpy as np
+
+# Artifacts live next to exports/ unless overridden for a deployment
+CACHE_DIR = os.getenv(
+    "TENDER_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cache", "artifacts"))
+)
+CACHE_MAX_BYTES = int(float(os.getenv("TENDER_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+
+CHUNKS_FILE = "chunks.json"
+VECTORS_FILE = "vectors.npy"
+INDEX_FILE = "index.faiss"
+META_FILE = "meta.json"
+LAST_USED_FILE = "last_used"
+
+# Flags tried in order when reading a stored index. IO_FLAG_MMAP_IFC maps flat and scalar-quantizer
+# codes straight from the file; plain IO_FLAG_MMAP only maps IVF lists and copies flat codes to the heap.
+INDEX_MMAP_FLAGS = [
+    flag | faiss.IO_FLAG_READ_ONLY
+    for flag in (getattr(faiss, "IO_FLAG_MMAP_IFC", None), faiss.IO_FLAG_MMAP) if flag is not None
+]
+
+
+# ------------------------------------------
+# 1. Content-addressed keys
+# ------------------------------------------
+def artifact_key(file_hash: str, chunker_version: str, embedding_model: str, index_type: str = "flat_ip") -> str:
+    """
+    Building the cache key from the PDF content hash and the versions that shaped its artifacts
+    """
+    raw = f"{file_hash}|chunker={chunker_version}|model={embedding_model}|index={index_type}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_dir(key: str) -> str:
+    return os.path.join(CACHE_DIR, key)
+
+
+# ------------------------------------------
+# 2. Load / save
+# ------------------------------------------
+def has_artifacts(key: str) -> bool:
+    return os.path.exists(os.path.join(_entry_dir(key), META_FILE))
+
+
+def _read_index(path: str):
+    for flags in INDEX_MMAP_FLAGS:
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError:
+            continue
+    return faiss.read_index(path)
+
+
+def load_artifacts(key: str, embedding_id: Optional[str] = None) -> Optional[Tuple[List[Tuple[str, str]], object, np.ndarray]]:
+    """
+    Loading (chunks, index, vectors) for a key, memory-mapping vectors and index where possible.
+    Entries recorded with a different embedding provider/dimension than embedding_id are rejected.
+    """
+    entry = _entry_dir(key)
+    try:
+        with open(os.path.join(entry, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if embedding_id is not None and meta.get("embedding_id") != embedding_id:
+            print(f"[Artifacts] Rejecting {key[:12]}: built with {meta.get('embedding_id')}, expected {embedding_id}")
+            return None
+        with open(os.path.join(entry, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            chunks = [tuple(chunk) for chunk in json.load(f)]
+        vectors = np.load(os.path.join(entry, VECTORS_FILE), mmap_mode="r")
+        index = _read_index(os.path.join(entry, INDEX_FILE))
+    except (OSError, ValueError, RuntimeError):
+        return None
+    if index.d != meta.get("dimension", index.d):
+        return None
+
+    _touch(entry)
+    return chunks, index, vectors
+
+
+def save_artifacts(key: str, chunks: List[Tuple[str, str]], index, vectors: np.ndarray,
+                   embedding_id: Optional[str] = None) -> None:
+    """
+    Writing the artifacts into a staging directory and swapping it into place atomically
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=CACHE_DIR)
+    try:
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"embedding_id": embedding_id, "dimension": int(index.d), "chunks": len(chunks)}, f)
+        with open(os.path.join(staging, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump([list(chunk) for chunk in chunks], f, ensure_ascii=False)
+        np.save(os.path.join(staging, VECTORS_FILE), np.ascontiguousarray(vectors, dtype=np.float32))
+        faiss.write_index(index, os.path.join(staging, INDEX_FILE))
+        _touch(staging)
+
+        entry = _entry_dir(key)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    evict_lru(keep=key)
+
+
+# ------------------------------------------
+# 3. Size cap with LRU eviction
+# ------------------------------------------
+def _touch(entry: str) -> None:
+    path = os.path.join(entry, LAST_USED_FILE)
+    with open(path, "w") as f:
+        f.write(str(time.time()))
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _last_used(entry: str) -> float:
+    try:
+        return os.path.getmtime(os.path.join(entry, LAST_USED_FILE))
+    except OSError:
+        return 0.0
+
+
+def evict_lru(max_bytes: int = CACHE_MAX_BYTES, keep: Optional[str] = None) -> List[str]:
+    """
+    Removing least-recently-used entries until the store fits under max_bytes
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return []
+
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        entries.append((_last_used(path), name, _dir_size(path)))
+
+    total = sum(size for _, _, size in entries)
+    evicted = []
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+        total -= size
+        evicted.append(name)
+    return evicted
@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from ingest import ingest_pdf, hash_stream, CHUNKS_VERSION
+from vector_store import build_faiss_index, embed_query, hybrid_search_ids, embedding_model_id, INDEX_TYPE, RETRIEVAL_MODE
+from embedding_providers import get_embedding_provider
+from llm_client import achat, run_async
+from lexical_index import BM25Index
+from artifact_store import artifact_key, load_artifacts, save_artifacts
+from prompts import build_rag_prompt, PROMPT_TEMPLATE_VERSION
+from context_packer import pack_context
+from answer_cache import normalize_query
+from tokens import count_tokens
+from chat import CHAT_MODEL
+from perf import recorder, observe, count
+
+load_dotenv()
+
+DEFAULT_QUESTIONS_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "data", "questions", "qualification.txt")
+)
+# Parallel PDF parses; each runs in its own process
+BATCH_PARSE_WORKERS = int(os.getenv("BATCH_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# LLM requests in flight at once, and the request rate they are spread over (0 = no rate cap)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_REQUESTS_PER_MINUTE = float(os.getenv("BATCH_REQUESTS_PER_MINUTE", "0"))
+
+
+# ------------------------------------------
+# 1. Inputs and resume state
+# ------------------------------------------
+def load_questions(path: str = DEFAULT_QUESTIONS_PATH) -> List[str]:
+    """
+    Reading one question per line (JSON list also accepted), skipping blanks and # comments
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".json"):
+        return [q.strip() for q in json.loads(text) if q.strip()]
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+def item_key(file_hash: str, question: str) -> str:
+    return f"{file_hash}:{normalize_query(question)}"
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """
+    Collecting keys of items already answered in an earlier run. Failed items and a line
+    truncated by a crash are not counted, so they are retried.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not record.get("error"):
+                completed.add(item_key(record["file_hash"], record["question"]))
+    return completed
+
+
+def _hash_file(pdf_path: str) -> str:
+    with open(pdf_path, "rb") as f:
+        return hash_stream(f)
+
+
+def _parse_chunks(pdf_path: str, file_hash: str) -> Tuple[List[Tuple[str, str]], float]:
+    # Runs in a worker process; only the chunks travel back, not the page records
+    start = time.perf_counter()
+    chunks = ingest_pdf(pdf_path, file_hash=file_hash, workers=1).chunks
+    return chunks, time.perf_counter() - start
+
+
+# ------------------------------------------
+# 2. Bounded, rate-limited LLM scheduler
+# ------------------------------------------
+class RequestScheduler:
+    """
+    Caps this run's in-flight chat requests with a semaphore and spaces request starts to stay
+    under requests_per_minute. Calls go through the shared llm_client, which adds the
+    process-wide connection pool, concurrency limit and rate-limit retries.
+    """
+
+    def __init__(self, concurrency: int = BATCH_CONCURRENCY, requests_per_minute: float = BATCH_REQUESTS_PER_MINUTE):
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._pace_lock = asyncio.Lock()
+        self.stats = {"retries": 0}
+
+    async def _pace(self) -> None:
+        if not self.interval:
+            return
+        async with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @property
+    def retries(self) -> int:
+        return self.stats["retries"]
+
+    async def complete(self, prompt: str, model: str, temperature: float, metrics: dict) -> str:
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            await self._pace()
+            metrics["queue_s"] = time.perf_counter() - queued_at
+            start = time.perf_counter()
+            call_stats = {}
+            try:
+                answer, usage_tokens = await run_async(achat(prompt, model, temperature, stats=call_stats))
+            finally:
+                self.stats["retries"] += call_stats.get("retries", 0)
+            metrics["llm_s"] = time.perf_counter() - start
+            metrics["output_tokens"] = usage_tokens if usage_tokens is not None else count_tokens(answer)
+            metrics["attempts"] = 1 + call_stats.get("retries", 0)
+            observe("chat", metrics["llm_s"])
+            count("chat_output_tokens", metrics["output_tokens"])
+            return answer
+
+
+# ------------------------------------------
+# 3. Batch run
+# ------------------------------------------
+async def _prepare_document(pdf_path: str, file_hash: str, pool: ProcessPoolExecutor) -> dict:
+    """
+    Loading a tender's stored artifacts, or parsing it in the pool and indexing it on a miss
+    """
+    loop = asyncio.get_running_loop()
+    timings = {"parse_s": 0.0, "index_s": 0.0}
+    artifacts = None
+    if get_embedding_provider().is_ready:
+        start = time.perf_counter()
+        artifacts = await asyncio.to_thread(
+            load_artifacts,
+            artifact_key(file_hash, CHUNKS_VERSION, embedding_model_id(), INDEX_TYPE),
+            embedding_model_id(),
+        )
+        timings["index_s"] = time.perf_counter() - start
+    if artifacts is not None:
+        chunks, index, _ = artifacts
+    else:
+        chunks, timings["parse_s"] = await loop.run_in_executor(pool, _parse_chunks, pdf_path, file_hash)
+        # Layout and classification run in the worker process, so they are recorded here as one span
+        observe("parse", timings["parse_s"])
+        start = time.perf_counter()
+        index, vectors = await asyncio.to_thread(build_faiss_index, chunks)
+        store_key = artifact_key(file_hash, CHUNKS_VERSION, embedding_model_id(), INDEX_TYPE)
+        await asyncio.to_thread(save_artifacts, store_key, chunks, index, vectors, embedding_model_id())
+        timings["index_s"] = time.perf_counter() - start
+    return {"chunks": chunks, "index": index, "lexical": BM25Index(chunks), "timings": timings}
+
+
+async def _answer_item(doc: dict, pdf_path: str, file_hash: str, question: str, scheduler: RequestScheduler,
+                       model: str, temperature: float, mode: str) -> dict:
+    item = {"file": os.path.basename(pdf_path), "file_hash": file_hash, "question": question}
+    metrics = {}
+    start = time.perf_counter()
+    try:
+        query_vector = None
+        if mode != "keyword":
+            query_vector = await asyncio.to_thread(embed_query, question)
+        top_ids = hybrid_search_ids(question, doc["index"], doc["lexical"], mode=mode, query_vector=query_vector)
+        context = pack_context([doc["chunks"][i] for i in top_ids])
+        prompt = build_rag_prompt(context, question)
+        metrics["retrieve_s"] = time.perf_counter() - start
+        metrics["prompt_tokens"] = count_tokens(prompt)
+        answer = await scheduler.complete(prompt, model, temperature, metrics)
+        item.update({"answer": answer, "sections": [title for title, _ in context]})
+    except Exception as e:
+        item["error"] = f"{type(e).__name__}: {e}"
+    metrics["total_s"] = time.perf_counter() - start
+    item.update({
+        "model": model,
+        "temperature": temperature,
+        "prompt_version": PROMPT_TEMPLATE_VERSION,
+        "retrieval_mode": mode,
+        "timings": {k: round(v, 4) for k, v in {**doc["timings"], **metrics}.items() if k.endswith("_s")},
+        "prompt_tokens": metrics.get("prompt_tokens"),
+        "output_tokens": metrics.get("output_tokens"),
+    })
+    return item
+
+
+async def run_batch(pdf_paths: List[str], questions: List[str], output_path: str,
+                    model: str = CHAT_MODEL, temperature: float = 0.2, mode: Optional[str] = None,
+                    parse_workers: int = BATCH_PARSE_WORKERS, concurrency: int = BATCH_CONCURRENCY,
+                    requests_per_minute: float = BATCH_REQUESTS_PER_MINUTE) -> Dict[str, float]:
+    """
+    Answering every question against every tender and appending one JSONL record per item.
+    Items already in output_path are skipped, so an interrupted run resumes where it stopped.
+    """
+    mode = mode or RETRIEVAL_MODE
+    run_start = time.perf_counter()
+    completed = load_completed(output_path)
+    scheduler = RequestScheduler(concurrency, requests_per_minute)
+
+    # Hashing is cheap and tells us which tenders still have work before anything is parsed
+    pending: Dict[str, Tuple[str, List[str]]] = {}
+    for pdf_path in pdf_paths:
+        file_hash = _hash_file(pdf_path)
+        todo = [q for q in questions if item_key(file_hash, q) not in completed]
+        if todo and file_hash not in pending:
+            pending[file_hash] = (pdf_path, todo)
+    skipped = len(pdf_paths) * len(questions) - sum(len(todo) for _, todo in pending.values())
+    print(f"[Batch] {len(pdf_paths)} tenders x {len(questions)} questions; {skipped} already done, "
+          f"{len(pending)} tenders to process.")
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    write_lock = asyncio.Lock()
+    counts = {"answered": 0, "failed": 0}
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=max(1, parse_workers)) as pool:
+
+        async def write(record: dict) -> None:
+            async with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                # Flushed per item so a crash loses at most the item in flight
+                out.flush()
+            counts["failed" if record.get("error") else "answered"] += 1
+
+        async def process(file_hash: str, pdf_path: str, todo: List[str]) -> None:
+            try:
+                doc = await _prepare_document(pdf_path, file_hash, pool)
+            except Exception as e:
+                print(f"[Batch] Failed to index {os.path.basename(pdf_path)}: {e}")
+                for question in todo:
+                    await write({"file": os.path.basename(pdf_path), "file_hash": file_hash,
+                                 "question": question, "error": f"{type(e).__name__}: {e}"})
+                return
+            print(f"[Batch] Indexed {os.path.basename(pdf_path)} ({len(doc['chunks'])} sections)")
+            items = [_answer_item(doc, pdf_path, file_hash, q, scheduler, model, temperature, mode) for q in todo]
+            for finished in asyncio.as_completed(items):
+                await write(await finished)
+
+        await asyncio.gather(*(process(h, path, todo) for h, (path, todo) in pending.items()))
+
+    elapsed = time.perf_counter() - run_start
+    summary = {**counts, "skipped": skipped, "retries": scheduler.retries, "seconds": round(elapsed, 2)}
+    print(f"[Batch] Done in {elapsed:.1f}s: {counts['answered']} answered, {counts['failed']} failed, "
+          f"{skipped} skipped, {scheduler.retries} retries.")
+    return summary
+
+
+def write_reports(output_path: str, report_dir: str, questions: Optional[List[str]] = None) -> List[str]:
+    """
+    Rendering one qualification-sheet PDF per tender from the answered items in output_path
+    """
+    from pdf_exporter import render_report_pdf
+
+    by_doc: Dict[str, dict] = {}
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("error"):
+                continue
+            doc = by_doc.setdefault(record["file_hash"], {"file": record["file"], "items": {}})
+            doc["items"][normalize_query(record["question"])] = record
+
+    order = {normalize_query(q): i for i, q in enumerate(questions or [])}
+    os.makedirs(report_dir, exist_ok=True)
+    written = []
+    for doc in by_doc.values():
+        records = sorted(doc["items"].values(), key=lambda r: order.get(normalize_query(r["question"]), len(order)))
+        items = [
+            (r["question"], f"{r['answer']}\n\nSections used: {'; '.join(r.get('sections', []))}", [])
+            for r in records
+        ]
+        path = os.path.join(report_dir, f"{os.path.splitext(doc['file'])[0]}_report.pdf")
+        with open(path, "wb") as f:
+            f.write(render_report_pdf(items, title=doc["file"], include_context=False))
+        written.append(path)
+    print(f"[Batch] Wrote {len(written)} reports to {report_dir}")
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Answer a question set against every tender in a folder")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS_PATH, help="One question per line, or a JSON list")
+    parser.add_argument("--output", default="exports/batch_answers.jsonl")
+    parser.add_argument("--model", default=CHAT_MODEL)
+    parser.add_argument("--temperature", type=float, default=0.2)
+    parser.add_argument("--mode", choices=["semantic", "hybrid", "keyword"], default=None)
+    parser.add_argument("--parse-workers", type=int, default=BATCH_PARSE_WORKERS)
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=BATCH_REQUESTS_PER_MINUTE, help="Max chat requests per minute")
+    parser.add_argument("--metrics-dir", help="Write per-stage timings as perf.jsonl and perf.prom here")
+    parser.add_argument("--report-dir", help="Also write one PDF qualification sheet per tender here")
+    args = parser.parse_args()
+
+    pdf_paths = []
+    for pattern in args.inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.pdf")
+        pdf_paths.extend(sorted(glob.glob(pattern)))
+    if not pdf_paths:
+        raise SystemExit("No PDFs found.")
+
+    questions = load_questions(args.questions)
+    asyncio.run(run_batch(
+        pdf_paths, questions, args.output,
+        model=args.model, temperature=args.temperature, mode=args.mode,
+        parse_workers=args.parse_workers, concurrency=args.concurrency, requests_per_minute=args.rpm,
+    ))
+    if args.report_dir:
+        write_reports(args.output, args.report_dir, questions)
+    if args.metrics_dir:
+        os.makedirs(args.metrics_dir, exist_ok=True)
+        with open(os.path.join(args.metrics_dir, "perf.jsonl"), "w", encoding="utf-8") as f:
+            f.write(recorder.to_json_lines())
+        with open(os.path.join(args.metrics_dir, "perf.prom"), "w", encoding="utf-8") as f:
+            f.write(recorder.to_prometheus())
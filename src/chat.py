@@ -0,0 +1,48 @@
+import time
+from typing import Iterator, Optional
+
+from tokens import count_tokens
+from llm_client import stream_chat
+from perf import observe, count
+
+CHAT_MODEL = "gpt-4"
+
+
+def stream_chat_answer(prompt: str, temperature: float,
+                       metrics: Optional[dict] = None, model: str = CHAT_MODEL) -> Iterator[str]:
+    """
+    Streaming the answer as text deltas. When the stream ends, metrics holds
+    time-to-first-token, total latency and output tokens for the query.
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    usage_tokens = None
+    parts = []
+
+    # Shared pooled client; opening the stream is retried on rate limits
+    for event in stream_chat(prompt, model, temperature):
+        if getattr(event, "usage", None) is not None:
+            usage_tokens = event.usage.completion_tokens
+        if not event.choices:
+            continue
+        delta = event.choices[0].delta.content
+        if delta:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(delta)
+            yield delta
+
+    end = time.perf_counter()
+    ttft = (first_token_at - start) if first_token_at is not None else end - start
+    # Usage arrives in the final event; estimate locally if the endpoint omits it
+    output_tokens = usage_tokens if usage_tokens is not None else count_tokens("".join(parts))
+    observe("chat_ttft", ttft)
+    observe("chat", end - start)
+    count("chat_output_tokens", output_tokens)
+    if metrics is not None:
+        metrics.update({
+            "model": model,
+            "ttft_s": ttft,
+            "total_s": end - start,
+            "output_tokens": output_tokens,
+        })
@@ -0,0 +1,134 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
+from tokens import count_tokens, truncate_to_tokens
+
+# Sections longer than this are split into sub-chunks at ingest
+SECTION_MAX_TOKENS = int(os.getenv("SECTION_MAX_TOKENS", "800"))
+# Tokens of retrieved context allowed into one prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# 1.0 = pure relevance order, lower values favour sections that add new information
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+# Word-set Jaccard similarity above which two retrieved sections count as duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.85
+
+_WORD = re.compile(r"\w+")
+
+
+# ------------------------------------------
+# 1. Bounding section size at ingest
+# ------------------------------------------
+def _split_text(text: str, max_tokens: int) -> List[str]:
+    parts = []
+    current = []
+    current_tokens = 0
+    for paragraph in text.split("\n"):
+        paragraph_tokens = count_tokens(paragraph)
+        if paragraph_tokens > max_tokens:
+            # A single paragraph over the limit is cut on word boundaries
+            words = paragraph.split(" ")
+            pieces, piece, piece_tokens = [], [], 0
+            for word in words:
+                word_tokens = count_tokens(word) + 1
+                if piece and piece_tokens + word_tokens > max_tokens:
+                    pieces.append(" ".join(piece))
+                    piece, piece_tokens = [], 0
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                pieces.append(" ".join(piece))
+        else:
+            pieces = [paragraph]
+
+        for piece in pieces:
+            # +1 for the joining newline and per-piece rounding, so the joined part stays under max_tokens
+            piece_tokens = count_tokens(piece) + 1
+            if current and current_tokens + piece_tokens > max_tokens:
+                parts.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        parts.append("\n".join(current))
+    return [part for part in parts if part.strip()]
+
+
+def split_oversized_sections(chunks: List[Tuple[str, str]], max_tokens: int = SECTION_MAX_TOKENS) -> List[Tuple[str, str]]:
+    """
+    Splitting sections over max_tokens into "(part i/n)" sub-chunks at paragraph, then word, boundaries
+    """
+    bounded = []
+    for title, content in chunks:
+        if count_tokens(content) <= max_tokens:
+            bounded.append((title, content))
+            continue
+        parts = _split_text(content, max_tokens)
+        for i, part in enumerate(parts, start=1):
+            bounded.append((f"{title} (part {i}/{len(parts)})", part))
+    return bounded
+
+
+# ------------------------------------------
+# 2. Packing retrieved sections into a prompt budget
+# ------------------------------------------
+def _word_set(title: str, content: str) -> frozenset:
+    return frozenset(_WORD.findall(f"{title} {content}".lower()))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_context(ranked_chunks: List[Tuple[str, str]], token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 mmr_lambda: float = MMR_LAMBDA, stats: Optional[dict] = None) -> List[Tuple[str, str]]:
+    """
+    Choosing which retrieved sections go into the prompt. Input is best-first. Near-duplicates are
+    dropped, the rest are ordered by maximal marginal relevance and added until the budget is used.
+    """
+    word_sets = [_word_set(title, content) for title, content in ranked_chunks]
+
+    # Near-duplicate removal keeps the better-ranked copy
+    candidates = []
+    for i, words in enumerate(word_sets):
+        if any(_jaccard(words, word_sets[j]) >= NEAR_DUPLICATE_THRESHOLD for j in candidates):
+            continue
+        candidates.append(i)
+    duplicates = len(ranked_chunks) - len(candidates)
+
+    # Relevance from retrieval rank, diversity from word overlap with what is already selected
+    n = max(1, len(ranked_chunks))
+    relevance = {i: 1.0 - i / n for i in candidates}
+    selected, used_tokens = [], 0
+    remaining = list(candidates)
+    token_counts = {i: count_tokens(ranked_chunks[i][1]) for i in candidates}
+    while remaining:
+        def mmr(i):
+            redundancy = max((_jaccard(word_sets[i], word_sets[j]) for j in selected), default=0.0)
+            return mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+
+        best = max(remaining, key=lambda i: (mmr(i), -i))
+        remaining.remove(best)
+        if used_tokens + token_counts[best] <= token_budget:
+            selected.append(best)
+            used_tokens += token_counts[best]
+
+    packed = [ranked_chunks[i] for i in selected]
+    if not packed and candidates:
+        # Even the best section is over budget on its own: send a truncated copy rather than nothing
+        title, content = ranked_chunks[candidates[0]]
+        content = truncate_to_tokens(content, token_budget)
+        packed = [(title, content)]
+        used_tokens = count_tokens(content)
+
+    if stats is not None:
+        stats.update({
+            "retrieved": len(ranked_chunks),
+            "near_duplicates": duplicates,
+            "packed": len(packed),
+            "context_tokens": used_tokens,
+            "token_budget": token_budget,
+        })
+    return packed
@@ -0,0 +1,299 @@
+import os
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+CORPUS_DIR = os.getenv(
+    "CORPUS_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cache", "corpus"))
+)
+# Written before per-document shards; converted to shards the first time they are loaded
+CORPUS_INDEX_FILE = "corpus.faiss"
+CORPUS_META_FILE = "corpus_meta.json"
+# Vector space of the whole corpus
+CORPUS_INFO_FILE = "corpus.json"
+# One shard per document: vectors, (doc id, name) record, and section titles and text
+SHARDS_DIR = "docs"
+SHARD_VECTORS = ".npy"
+SHARD_META = ".meta.json"
+SHARD_SECTIONS = ".sections.json"
+
+
+def _safe_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+
+def _write_atomic(path: str, write) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _write_json(path: str, data) -> None:
+    _write_atomic(path, lambda f: f.write(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+
+
+class CorpusIndex:
+    """
+    One FAISS index holding vectors from many tenders, with a (doc id, position) record per vector.
+    Documents are added or replaced in place; nothing is rebuilt. With a directory, each document
+    is persisted as its own shard when it is added, so adding a tender costs O(tender), not
+    O(corpus); section text stays in the shards and is read back only for search hits.
+    """
+
+    def __init__(self, dimension: int, embedding_id: Optional[str] = None, directory: Optional[str] = None):
+        self.dimension = dimension
+        # Provider/model/dimension that produced the vectors; queries from any other space are rejected
+        self.embedding_id = embedding_id
+        # Vectors are unit-normalised, so inner product is cosine similarity
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self.docs: Dict[str, dict] = {}
+        self._vector_meta: Dict[int, Tuple[str, int]] = {}
+        # Section text of documents in a corpus without a directory
+        self._sections: Dict[str, List[Tuple[str, str]]] = {}
+        self._next_id = 0
+        self._lock = threading.RLock()
+        # None keeps the corpus in memory only
+        self.directory = directory
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    # ------------------------------------------
+    # 1. Adding / removing documents
+    # ------------------------------------------
+    def add_document(self, doc_id: str, chunks: List[Tuple[str, str]], vectors: np.ndarray,
+                     name: Optional[str] = None) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dim vectors, got {vectors.shape[1]}")
+        if len(chunks) != vectors.shape[0]:
+            raise ValueError("chunks and vectors must have the same length")
+
+        with self._lock:
+            if doc_id in self.docs:
+                self.remove_document(doc_id)
+            self._add(doc_id, name or doc_id, vectors)
+            if self.directory is None:
+                self._sections[doc_id] = [tuple(chunk) for chunk in chunks]
+            else:
+                self._write_shard(doc_id, self.docs[doc_id]["name"], chunks, vectors)
+
+    def _add(self, doc_id: str, name: str, vectors: np.ndarray) -> None:
+        ids = np.arange(self._next_id, self._next_id + vectors.shape[0], dtype=np.int64)
+        self._next_id += vectors.shape[0]
+        self.index.add_with_ids(vectors, ids)
+        for position, vector_id in enumerate(ids.tolist()):
+            self._vector_meta[vector_id] = (doc_id, position)
+        self.docs[doc_id] = {"name": name, "ids": ids.tolist()}
+
+    def remove_document(self, doc_id: str) -> None:
+        with self._lock:
+            doc = self.docs.pop(doc_id, None)
+            if doc is None:
+                return
+            self.index.remove_ids(np.array(doc["ids"], dtype=np.int64))
+            for vector_id in doc["ids"]:
+                self._vector_meta.pop(vector_id, None)
+            self._sections.pop(doc_id, None)
+            if self.directory is not None:
+                # The meta record goes first: a shard without one is ignored on load
+                for suffix in (SHARD_META, SHARD_VECTORS, SHARD_SECTIONS):
+                    try:
+                        os.remove(self._shard_path(doc_id, suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def document_sections(self, doc_id: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            if self.directory is None:
+                return self._sections.get(doc_id, [])
+        try:
+            with open(self._shard_path(doc_id, SHARD_SECTIONS), "r", encoding="utf-8") as f:
+                return [tuple(section) for section in json.load(f)]
+        except (OSError, ValueError):
+            return []
+
+    # ------------------------------------------
+    # 2. Search across all or a subset of documents
+    # ------------------------------------------
+    def search(self, query_vector: np.ndarray, k_per_doc: int = 3,
+               doc_ids: Optional[Iterable[str]] = None, max_docs: Optional[int] = None) -> List[dict]:
+        """
+        Returning up to k_per_doc best sections for each matching document, documents ordered by best score
+        """
+        query = np.ascontiguousarray(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))
+        if query.shape[1] != self.dimension:
+            raise ValueError(f"Query has {query.shape[1]} dims; corpus was built with {self.embedding_id} ({self.dimension} dims)")
+        with self._lock:
+            if self.index.ntotal == 0:
+                return []
+            params = None
+            if doc_ids is not None:
+                doc_ids = [d for d in doc_ids if d in self.docs]
+                if not doc_ids:
+                    return []
+                allowed = np.array([i for d in doc_ids for i in self.docs[d]["ids"]], dtype=np.int64)
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+                candidates = len(allowed)
+                n_docs = len(doc_ids)
+            else:
+                candidates = self.index.ntotal
+                n_docs = len(self.docs)
+            wanted_docs = min(n_docs, max_docs) if max_docs else n_docs
+
+            # Widen the search until enough documents have k_per_doc hits (or everything was scanned)
+            k = min(candidates, max(k_per_doc * wanted_docs * 2, 32))
+            while True:
+                distances, ids = self.index.search(query, k, params=params)
+                per_doc: Dict[str, List[dict]] = {}
+                for score, vector_id in zip(distances[0].tolist(), ids[0].tolist()):
+                    if vector_id < 0:
+                        continue
+                    doc_id, position = self._vector_meta[vector_id]
+                    hits = per_doc.setdefault(doc_id, [])
+                    if len(hits) < k_per_doc:
+                        hits.append({"position": position, "score": score})
+                full_docs = sum(1 for hits in per_doc.values() if len(hits) >= k_per_doc)
+                if k >= candidates or full_docs >= wanted_docs:
+                    break
+                k = min(candidates, k * 4)
+
+            results = [
+                {"doc_id": doc_id, "name": self.docs[doc_id]["name"], "score": hits[0]["score"], "sections": hits}
+                for doc_id, hits in per_doc.items()
+            ]
+        results.sort(key=lambda r: r["score"], reverse=True)
+        results = results[:max_docs] if max_docs else results
+        # Section text is only read for the documents returned
+        for result in results:
+            sections = self.document_sections(result["doc_id"])
+            for hit in result["sections"]:
+                hit["title"], hit["content"] = sections[hit["position"]] if hit["position"] < len(sections) else ("", "")
+        return results
+
+    # ------------------------------------------
+    # 3. Persistence
+    # ------------------------------------------
+    def _shard_path(self, doc_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, SHARDS_DIR, _safe_name(doc_id) + suffix)
+
+    def _write_shard(self, doc_id: str, name: str, chunks: List[Tuple[str, str]], vectors: np.ndarray) -> None:
+        os.makedirs(os.path.join(self.directory, SHARDS_DIR), exist_ok=True)
+        info_path = os.path.join(self.directory, CORPUS_INFO_FILE)
+        if not os.path.exists(info_path):
+            _write_json(info_path, {"dimension": self.dimension, "embedding_id": self.embedding_id})
+        _write_json(self._shard_path(doc_id, SHARD_SECTIONS), [list(chunk) for chunk in chunks])
+        _write_atomic(self._shard_path(doc_id, SHARD_VECTORS), lambda f: np.save(f, vectors))
+        # Written last: a document only exists on disk once its meta record does
+        _write_json(self._shard_path(doc_id, SHARD_META), {"doc_id": doc_id, "name": name})
+
+    @classmethod
+    def load(cls, directory: str = CORPUS_DIR) -> Optional["CorpusIndex"]:
+        """
+        Rebuilding the corpus from its shards, or None if there is no corpus at directory
+        """
+        if not os.path.exists(os.path.join(directory, CORPUS_INFO_FILE)):
+            return cls._load_legacy(directory)
+        try:
+            with open(os.path.join(directory, CORPUS_INFO_FILE), "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        corpus = cls(info["dimension"], info.get("embedding_id"), directory)
+        shards_dir = os.path.join(directory, SHARDS_DIR)
+        names = sorted(os.listdir(shards_dir)) if os.path.isdir(shards_dir) else []
+        for name in names:
+            if not name.endswith(SHARD_META):
+                continue
+            try:
+                with open(os.path.join(shards_dir, name), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                vectors = np.load(os.path.join(shards_dir, name[:-len(SHARD_META)] + SHARD_VECTORS))
+            except (OSError, ValueError) as e:
+                print(f"[Corpus] Skipping unreadable shard {name}: {e}")
+                continue
+            corpus._add(meta["doc_id"], meta["name"], np.ascontiguousarray(vectors, dtype=np.float32))
+        return corpus
+
+    @classmethod
+    def _load_legacy(cls, directory: str) -> Optional["CorpusIndex"]:
+        # A corpus saved as one FAISS file plus one JSON of every section, converted to shards once
+        try:
+            with open(os.path.join(directory, CORPUS_META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            index = faiss.read_index(os.path.join(directory, CORPUS_INDEX_FILE))
+        except (OSError, ValueError, RuntimeError):
+            return None
+        vectors_meta = {int(k): v for k, v in meta["vectors"].items()}
+        corpus = cls(meta["dimension"], meta.get("embedding_id"), directory)
+        for doc_id, doc in meta["docs"].items():
+            ids = doc["ids"]
+            vectors = np.vstack([index.reconstruct(i) for i in ids]) if ids else np.zeros((0, corpus.dimension), dtype=np.float32)
+            chunks = [tuple(vectors_meta[i][2:4]) for i in ids]
+            corpus.add_document(doc_id, chunks, vectors, name=doc["name"])
+        for legacy in (CORPUS_INDEX_FILE, CORPUS_META_FILE):
+            os.remove(os.path.join(directory, legacy))
+        print(f"[Corpus] Converted {len(corpus.docs)} tenders to per-document shards")
+        return corpus
+
+
+def corpus_dir_for(embedding_id: str, root: str = CORPUS_DIR) -> str:
+    # One corpus per vector space, so switching provider never mixes incompatible vectors
+    return os.path.join(root, _safe_name(embedding_id))
+
+
+def load_or_create_corpus(dimension: int, embedding_id: str, root: str = CORPUS_DIR) -> CorpusIndex:
+    directory = corpus_dir_for(embedding_id, root)
+    corpus = CorpusIndex.load(directory)
+    if corpus is None:
+        corpus = CorpusIndex(dimension, embedding_id, directory)
+    if corpus.dimension != dimension or corpus.embedding_id != embedding_id:
+        raise ValueError(
+            f"Corpus at {directory} was built with {corpus.embedding_id} ({corpus.dimension} dims), "
+            f"not {embedding_id} ({dimension} dims)"
+        )
+    corpus.directory = directory
+    return corpus
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    from ingest import ingest_pdf
+    from vector_store import embed_texts, embed_query, embedding_model_id
+
+    parser = argparse.ArgumentParser(description="Add tenders to, or search, the cross-tender corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add_cmd = sub.add_parser("add", help="Ingest and add PDFs to the corpus")
+    add_cmd.add_argument("paths", nargs="+", help="PDF files or glob patterns")
+    search_cmd = sub.add_parser("search", help="Search all (or some) tenders")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--k-per-doc", type=int, default=2)
+    search_cmd.add_argument("--max-docs", type=int, default=10)
+    search_cmd.add_argument("--doc", action="append", help="Restrict to this doc id (repeatable)")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        corpus = None
+        for pattern in args.paths:
+            for pdf_path in sorted(glob.glob(pattern)):
+                result = ingest_pdf(pdf_path)
+                vectors = embed_texts(result.chunks)
+                if corpus is None:
+                    corpus = load_or_create_corpus(vectors.shape[1], embedding_model_id())
+                corpus.add_document(result.file_hash, result.chunks, vectors, name=os.path.basename(pdf_path))
+                print(f"Added {os.path.basename(pdf_path)} ({len(result.chunks)} sections)")
+    else:
+        query_vector = embed_query(args.query)
+        corpus = CorpusIndex.load(corpus_dir_for(embedding_model_id()))
+        if corpus is None:
+            raise SystemExit("Corpus is empty; add tenders first.")
+        for doc in corpus.search(query_vector, args.k_per_doc, args.doc, args.max_docs):
+            print(f"\n{doc['name']} (score {doc['score']:.3f})")
+            for section in doc["sections"]:
+                print(f"  - {section['title']} ({section['score']:.3f})")
@@ -0,0 +1,181 @@
+import os
+import re
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from visual_chunker import PageRecord, NO_CONTENT
+from tokens import count_tokens
+from perf import timed, count
+
+# Off: chunks go to the embedder exactly as the chunker produced them
+DEDUP_ENABLED = os.getenv("BOILERPLATE_DEDUP", "1") != "0"
+# Bump whenever a change here alters which blocks or chunks are dropped
+DEDUP_VERSION = "1"
+
+# A block is boilerplate when the same text sits at the same height on this share of pages (and at least MIN_PAGES)
+BOILERPLATE_PAGE_SHARE = float(os.getenv("BOILERPLATE_PAGE_SHARE", "0.5"))
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", "3"))
+# Vertical distance, as a fraction of page height, within which two occurrences count as the same position
+BOILERPLATE_POSITION_TOLERANCE = 0.05
+
+# SimHash fingerprints differing in at most this many of 64 bits are near-duplicates
+NEAR_DUPLICATE_MAX_BITS = int(os.getenv("NEAR_DUPLICATE_MAX_BITS", "3"))
+# Shorter sections ("Yes", a date, a value) only collapse when title and text are both identical
+SIMHASH_MIN_WORDS = 20
+
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+
+
+# ------------------------------------------
+# 1. Running headers, footers and notices repeated across pages
+# ------------------------------------------
+def _block_key(text: str) -> str:
+    # Page numbers and dates vary from page to page; "Page 3 of 40" and "Page 4 of 40" share a key
+    return _DIGITS.sub("#", " ".join(text.lower().split()))
+
+
+def find_boilerplate(pages: List[PageRecord]) -> Dict[str, float]:
+    """
+    Text keys (digits masked) that appear at the same vertical position on at least
+    BOILERPLATE_PAGE_SHARE of the pages, mapped to that position
+    """
+    min_pages = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_PAGE_SHARE * len(pages))
+    occurrences: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for page_index, page in enumerate(pages):
+        for block, position in zip(page.blocks, page.positions):
+            occurrences[_block_key(block.text)].append((page_index, position))
+
+    boilerplate = {}
+    for key, places in occurrences.items():
+        if len(places) < min_pages:
+            continue
+        # Occurrences around the typical position; the same words elsewhere on a page are body text
+        centre = float(np.median([position for _, position in places]))
+        aligned_pages = {page_index for page_index, position in places
+                         if abs(position - centre) <= BOILERPLATE_POSITION_TOLERANCE}
+        if len(aligned_pages) >= min_pages:
+            boilerplate[key] = centre
+    return boilerplate
+
+
+def is_boilerplate(text: str, position: float, boilerplate: Dict[str, float]) -> bool:
+    centre = boilerplate.get(_block_key(text))
+    return centre is not None and abs(position - centre) <= BOILERPLATE_POSITION_TOLERANCE
+
+
+@timed("dedup_blocks")
+def strip_repeated_blocks(pages: List[PageRecord], stats: Optional[dict] = None,
+                          boilerplate: Optional[Dict[str, float]] = None) -> List[PageRecord]:
+    """
+    Dropping boilerplate blocks, as found by find_boilerplate over these pages unless given
+    (e.g. learned from the first pages of a document still being parsed). Pages without
+    recorded positions are left untouched.
+    """
+    if boilerplate is None:
+        boilerplate = find_boilerplate(pages)
+
+    stripped = []
+    removed_blocks = 0
+    removed_tokens = 0
+    for page in pages:
+        if not page.positions or not boilerplate:
+            stripped.append(page)
+            continue
+        blocks, positions = [], []
+        for block, position in zip(page.blocks, page.positions):
+            if is_boilerplate(block.text, position, boilerplate):
+                removed_blocks += 1
+                removed_tokens += count_tokens(block.text)
+            else:
+                blocks.append(block)
+                positions.append(position)
+        stripped.append(page._replace(blocks=blocks, positions=tuple(positions)))
+
+    if stats is not None:
+        stats["boilerplate_blocks"] = removed_blocks
+        stats["boilerplate_tokens"] = removed_tokens
+    count("boilerplate_blocks_removed", removed_blocks)
+    count("boilerplate_tokens_removed", removed_tokens)
+    return stripped
+
+
+# ------------------------------------------
+# 2. Duplicate and near-duplicate sections
+# ------------------------------------------
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word trigrams: similar texts get fingerprints a few bits apart
+    """
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    # Each bit of the fingerprint is the majority vote of that bit across shingles
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes, bitorder="little").tobytes(), "little")
+
+
+def _bands(fingerprint: int, n_bands: int) -> List[Tuple[int, int]]:
+    width = 64 // n_bands
+    mask = (1 << width) - 1
+    return [(band, (fingerprint >> (band * width)) & mask) for band in range(n_bands)]
+
+
+@timed("dedup_chunks")
+def dedup_chunks(chunks: List[Tuple[str, str]], max_bits: int = NEAR_DUPLICATE_MAX_BITS,
+                 stats: Optional[dict] = None) -> List[Tuple[str, str]]:
+    """
+    Collapsing sections whose text is identical, or whose SimHash is within max_bits, into their
+    first occurrence; short sections also need the same title. Fingerprints are split into
+    max_bits + 1 bands: two within max_bits bits must agree exactly on at least one band, so
+    only those bucket-mates are compared.
+    """
+    n_bands = max_bits + 1
+    seen_text = set()
+    buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    kept_fingerprints: List[int] = []
+    kept = []
+    removed_chunks = 0
+    removed_tokens = 0
+
+    for title, content in chunks:
+        if content == NO_CONTENT:
+            # Header-only sections carry their title, not text; they are never collapsed
+            kept.append((title, content))
+            continue
+        normalized = " ".join(content.lower().split())
+        long_enough = len(normalized.split()) >= SIMHASH_MIN_WORDS
+        if not long_enough:
+            normalized = f"{' '.join(title.lower().split())}\n{normalized}"
+        duplicate = normalized in seen_text
+        fingerprint = None
+        if not duplicate and long_enough:
+            fingerprint = simhash(normalized)
+            bands = _bands(fingerprint, n_bands)
+            candidates = {i for band in bands for i in buckets.get(band, ())}
+            duplicate = any(bin(fingerprint ^ kept_fingerprints[i]).count("1") <= max_bits for i in candidates)
+
+        if duplicate:
+            removed_chunks += 1
+            removed_tokens += count_tokens(f"{title}\n{content}")
+            continue
+        seen_text.add(normalized)
+        if fingerprint is not None:
+            for band in bands:
+                buckets[band].append(len(kept_fingerprints))
+            kept_fingerprints.append(fingerprint)
+        kept.append((title, content))
+
+    if stats is not None:
+        stats["duplicate_chunks"] = removed_chunks
+        stats["duplicate_tokens"] = removed_tokens
+    count("duplicate_chunks_removed", removed_chunks)
+    count("duplicate_tokens_removed", removed_tokens)
+    return kept
@@ -1,8 +1,12 @@
 import pdfplumber
 
-def extract_text_from_pdf(file_path: str) -> str:
-    all_text = ""
+def extract_text_from_pdf(file_path: str, pages=None) -> str:
+    # Reuse pages already parsed at ingest (visual_chunker.PageRecord) instead of parsing the PDF again
+    if pages is not None:
+        return "\n".join(page.text for page in pages) + ("\n" if pages else "")
+
+    page_texts = []
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
-            all_text += page.extract_text() + "\n"
-    return all_text
+            page_texts.append(page.extract_text() or "")
+    return "\n".join(page_texts) + ("\n" if page_texts else "")
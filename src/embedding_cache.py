@@ -0,0 +1,124 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBED_CACHE_PATH = os.getenv(
+    "EMBED_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cache", "embeddings.sqlite3"))
+)
+# Least-recently-used embeddings beyond this many are deleted (about 2 KB each at 1024 float16 dims)
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "500000"))
+
+
+def chunk_key(model: str, text: str) -> str:
+    """
+    Hashing (model, chunk text) so unchanged sections of a reissued tender hit the cache
+    """
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed map of chunk key -> float16 embedding blob, shared by all threads of the process.
+    Each row records when it was last read or written; the store is trimmed back to max_rows by
+    deleting the least recently used rows after every write.
+    """
+
+    def __init__(self, path: str = EMBED_CACHE_PATH, max_rows: int = EMBED_CACHE_MAX_ROWS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used INTEGER NOT NULL DEFAULT 0)"  # microseconds since the epoch
+        )
+        # Stores written before eviction existed have no last_used column; their rows go first
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "last_used" not in columns:
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, dim, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                if rows:
+                    self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                           [(time.time_ns() // 1000, row[0]) for row in rows])
+                    self._conn.commit()
+            for key, dim, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float16)
+                if vector.shape[0] == dim:
+                    found[key] = vector.astype(np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        now = time.time_ns() // 1000
+        rows = [
+            (key, int(vector.shape[0]), np.asarray(vector, dtype=np.float16).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        self.evict_lru()
+
+    def evict_lru(self, max_rows: Optional[int] = None) -> int:
+        """
+        Deleting least-recently-used rows until at most max_rows remain; returns how many were deleted
+        """
+        max_rows = self.max_rows if max_rows is None else max_rows
+        with self._lock:
+            excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - max_rows
+            if excess <= 0:
+                return 0
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN"
+                " (SELECT key FROM embeddings ORDER BY last_used, rowid LIMIT ?)", (excess,)
+            )
+            self._conn.commit()
+        print(f"[EmbeddingCache] Evicted {excess} least recently used embeddings")
+        return excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Returning the process-wide cache, or None when disabled with EMBED_CACHE=0
+    """
+    global _default_cache
+    if os.getenv("EMBED_CACHE", "1") == "0":
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
@@ -0,0 +1,273 @@
+import os
+import pickle
+import hashlib
+import threading
+from typing import List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from tokens import count_tokens, truncate_to_tokens
+from llm_client import embed_batches
+
+load_dotenv()
+
+# openai | local
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+# text-embedding-3 models can return shortened vectors; unset keeps the native 3072 dimensions
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+
+# Per-request limits for the embeddings endpoint; batches stay well under them
+EMBED_MAX_INPUT_TOKENS = 8191
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "20000"))
+EMBED_BATCH_MAX_ITEMS = int(os.getenv("EMBED_BATCH_MAX_ITEMS", "256"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+LOCAL_EMBEDDING_MODEL_PATH = os.getenv(
+    "LOCAL_EMBEDDING_MODEL_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cache", "local_embedding.pkl"))
+)
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "256"))
+# Without a fitted model, a batch of at least this many sections may fit one; smaller inputs
+# (a query, one short tender) would pin a degenerate low-dimensional model on disk
+LOCAL_EMBEDDING_MIN_FIT_TEXTS = int(os.getenv("LOCAL_EMBEDDING_MIN_FIT_TEXTS", str(2 * LOCAL_EMBEDDING_DIM)))
+
+
+class EmbeddingProvider:
+    """
+    Interface every embedding backend implements. model_id names the vector space
+    (provider, model, dimension) and is recorded with caches and indexes built from it.
+    """
+    name = "base"
+
+    @property
+    def model_id(self) -> str:
+        raise NotImplementedError
+
+    def prepare(self, text: str) -> str:
+        """
+        Normalising one input before it is hashed for the cache and embedded
+        """
+        return text
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        False while the backend still needs fitting, i.e. model_id is not yet known
+        """
+        return True
+
+    def ensure_ready(self, texts: List[str]) -> None:
+        """
+        Giving backends that learn from data a chance to fit before the first embed
+        """
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None, stats: Optional[dict] = None) -> List[np.ndarray]:
+        """
+        Embedding texts in order; stats receives backend-specific counters such as 'batches'
+        """
+        raise NotImplementedError
+
+
+# ------------------------------------------
+# 1. OpenAI backend: token-bounded batches sent concurrently through llm_client
+# ------------------------------------------
+def make_token_batches(token_counts: List[int],
+                       max_tokens: int = EMBED_BATCH_MAX_TOKENS,
+                       max_items: int = EMBED_BATCH_MAX_ITEMS) -> List[List[int]]:
+    """
+    Grouping input positions into consecutive batches bounded by token and item count
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for i, n_tokens in enumerate(token_counts):
+        if current and (current_tokens + n_tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += n_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, model: str = EMBEDDING_MODEL, dimensions: Optional[int] = EMBEDDING_DIMENSIONS,
+                 concurrency: int = EMBED_CONCURRENCY):
+        self.model = model
+        self.dimensions = dimensions
+        self.concurrency = concurrency
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.model}@{self.dimensions}" if self.dimensions else self.model
+
+    def prepare(self, text: str) -> str:
+        return truncate_to_tokens(text, EMBED_MAX_INPUT_TOKENS)
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None, stats: Optional[dict] = None) -> List[np.ndarray]:
+        """
+        Sending texts in token-bounded batches over the shared async client, at most
+        self.concurrency batches in flight, preserving order
+        """
+        if token_counts is None:
+            token_counts = [count_tokens(text) for text in texts]
+        batches = make_token_batches(token_counts)
+        embeddings = [None] * len(texts)
+        if batches:
+            results = embed_batches([[texts[i] for i in batch] for batch in batches],
+                                    self.model, self.dimensions, concurrency=self.concurrency, stats=stats)
+            for batch, vectors in zip(batches, results):
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector
+        if stats is not None:
+            stats["batches"] = len(batches)
+        return [np.asarray(vector, dtype=np.float32) for vector in embeddings]
+
+
+# ------------------------------------------
+# 2. Local CPU backend: TF-IDF + truncated SVD fit on our tender corpus
+# ------------------------------------------
+class LocalTfidfSvdProvider(EmbeddingProvider):
+    """
+    Offline embeddings: sparse TF-IDF projected onto SVD components with one NumPy matmul per batch
+    """
+    name = "local"
+
+    def __init__(self, model_path: str = LOCAL_EMBEDDING_MODEL_PATH):
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._vectorizer = None
+        self._components = None
+        self._fingerprint = None
+        if os.path.exists(model_path):
+            self._load()
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._components is not None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.is_fitted
+
+    def _not_fitted(self, detail: str = "") -> RuntimeError:
+        return RuntimeError(
+            f"No local embedding model at {self.model_path}{detail}. Fit one on your tenders with "
+            f"`EMBEDDING_PROVIDER=local python src/embedding_providers.py fit \"data/rfps/*.pdf\"`."
+        )
+
+    def ensure_ready(self, texts: List[str]) -> None:
+        """
+        Bootstrapping a model from a large enough batch of document sections; queries and
+        small batches never fit one
+        """
+        with self._lock:
+            if self.is_fitted:
+                return
+            if len(texts) < LOCAL_EMBEDDING_MIN_FIT_TEXTS:
+                raise self._not_fitted(f" and {len(texts)} sections are too few to fit one from "
+                                       f"(LOCAL_EMBEDDING_MIN_FIT_TEXTS={LOCAL_EMBEDDING_MIN_FIT_TEXTS})")
+            print(f"[Embeddings] No local model at {self.model_path}; fitting on {len(texts)} texts.")
+            self.fit(texts)
+
+    @property
+    def dimension(self) -> int:
+        return self._components.shape[0]
+
+    @property
+    def model_id(self) -> str:
+        if not self.is_fitted:
+            raise self._not_fitted()
+        return f"local-tfidf-svd@{self.dimension}:{self._fingerprint}"
+
+    def _load(self) -> None:
+        with open(self.model_path, "rb") as f:
+            payload = f.read()
+        model = pickle.loads(payload)
+        self._vectorizer = model["vectorizer"]
+        self._components = np.ascontiguousarray(model["components"], dtype=np.float32)
+        self._fingerprint = hashlib.sha256(payload).hexdigest()[:12]
+
+    def fit(self, texts: List[str], dimension: int = LOCAL_EMBEDDING_DIM) -> None:
+        """
+        Fitting the vectorizer and SVD on corpus texts and saving them to model_path
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+
+        vectorizer = TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2), min_df=1,
+                                     max_features=200000, dtype=np.float32)
+        matrix = vectorizer.fit_transform(texts)
+        n_components = max(1, min(dimension, matrix.shape[0] - 1, matrix.shape[1] - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=0).fit(matrix)
+
+        os.makedirs(os.path.dirname(self.model_path) or ".", exist_ok=True)
+        tmp_path = self.model_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"vectorizer": vectorizer, "components": svd.components_.astype(np.float32)}, f)
+        os.replace(tmp_path, self.model_path)
+        self._load()
+
+    def embed(self, texts: List[str], token_counts: Optional[List[int]] = None, stats: Optional[dict] = None) -> List[np.ndarray]:
+        if not self.is_fitted:
+            raise self._not_fitted()
+        if stats is not None:
+            stats["batches"] = 1 if texts else 0
+        if not texts:
+            return []
+        sparse = self._vectorizer.transform(texts)
+        dense = np.asarray(sparse @ self._components.T, dtype=np.float32)
+        return list(dense)
+
+
+# ------------------------------------------
+# 3. Selection
+# ------------------------------------------
+_PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalTfidfSvdProvider,
+}
+_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Returning the process-wide provider chosen by EMBEDDING_PROVIDER
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if EMBEDDING_PROVIDER not in _PROVIDERS:
+                raise ValueError(f"Unknown embedding provider: {EMBEDDING_PROVIDER}")
+            _provider = _PROVIDERS[EMBEDDING_PROVIDER]()
+        return _provider
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    from ingest import ingest_pdf
+
+    parser = argparse.ArgumentParser(description="Fit the local TF-IDF + SVD embedding model on tender PDFs")
+    parser.add_argument("command", choices=["fit"])
+    parser.add_argument("paths", nargs="+", help="PDF files or glob patterns")
+    parser.add_argument("--dim", type=int, default=LOCAL_EMBEDDING_DIM)
+    args = parser.parse_args()
+
+    provider = LocalTfidfSvdProvider()
+    texts = []
+    for pattern in args.paths:
+        for pdf_path in sorted(glob.glob(pattern)):
+            # The same text embed_texts embeds: section content, not title
+            texts.extend(provider.prepare(content) for _, content in ingest_pdf(pdf_path).chunks)
+    provider.fit(texts, dimension=args.dim)
+    print(f"Fitted {provider.model_id} on {len(texts)} sections -> {provider.model_path}")
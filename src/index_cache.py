@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import faiss
+
+from perf import count, gauge
+
+# Prepared tenders (chunks, FAISS index, BM25 index) held in memory across all sessions
+INDEX_CACHE_MAX_BYTES = int(float(os.getenv("INDEX_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+
+
+def index_nbytes(index) -> int:
+    """
+    Approximate size of a FAISS index's codes, graph and inverted lists
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        return index_nbytes(faiss.downcast_index(index.storage)) + index.hnsw.neighbors.size() * 4
+    if isinstance(index, faiss.IndexIVF):
+        # Codes plus one 64-bit id per vector, and the coarse quantizer
+        return index.ntotal * (index.code_size + 8) + index_nbytes(faiss.downcast_index(index.quantizer))
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
+
+
+def document_nbytes(doc: dict) -> int:
+    """
+    Approximate memory held by one prepared tender: chunk strings, FAISS index and BM25 postings
+    """
+    chunks = sum(sys.getsizeof(title) + sys.getsizeof(content) for title, content in doc["chunks"])
+    return chunks + index_nbytes(doc["index"]) + doc["lexical"].nbytes
+
+
+class IndexCache:
+    """
+    Thread-safe, process-wide LRU of prepared tenders keyed by file hash, bounded by an estimated
+    byte budget rather than an entry count. Evicted tenders are reloaded from the artifact store.
+    """
+
+    def __init__(self, max_bytes: int = INDEX_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, file_hash: str) -> bool:
+        with self._lock:
+            return file_hash in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, file_hash: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is None:
+                self.misses += 1
+                count("index_cache_misses")
+                return None
+            self._entries.move_to_end(file_hash)
+            self.hits += 1
+            count("index_cache_hits")
+            return entry[0]
+
+    def put(self, file_hash: str, doc: dict) -> None:
+        """
+        Adding a tender and evicting least-recently-used ones until the budget holds.
+        The newest tender is always kept, even if it alone is over the budget.
+        """
+        nbytes = document_nbytes(doc)
+        with self._lock:
+            previous = self._entries.pop(file_hash, None)
+            if previous is not None:
+                self.resident_bytes -= previous[1]
+            self._entries[file_hash] = (doc, nbytes)
+            self.resident_bytes += nbytes
+            while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.resident_bytes -= evicted_bytes
+                self.evictions += 1
+                count("index_cache_evictions")
+                print(f"[IndexCache] Evicted {evicted[:8]} ({evicted_bytes / 1024 / 1024:.1f} MB)")
+            gauge("index_cache_resident_bytes", self.resident_bytes)
+            gauge("index_cache_entries", len(self._entries))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
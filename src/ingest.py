@@ -0,0 +1,137 @@
+import os
+import shutil
+import hashlib
+import itertools
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from visual_chunker import (PageRecord, extract_page_records, iter_page_records, chunk_pages, unstructured_fallback,
+                            iter_sections, font_size_threshold, CHUNKER_VERSION)
+from document_parser import extract_text_from_pdf
+from context_packer import split_oversized_sections, SECTION_MAX_TOKENS
+from dedup import strip_repeated_blocks, find_boilerplate, is_boilerplate, dedup_chunks, DEDUP_ENABLED, DEDUP_VERSION
+
+HASH_BLOCK_SIZE = 1024 * 1024
+# Pages a streamed document is read ahead by before header sizes and running headers/footers are fixed
+STREAM_WARMUP_PAGES = int(os.getenv("STREAM_WARMUP_PAGES", "8"))
+# Everything that shapes the chunks produced at ingest, for artifact cache keys
+CHUNKS_VERSION = f"{CHUNKER_VERSION}+split{SECTION_MAX_TOKENS}" + (f"+dedup{DEDUP_VERSION}" if DEDUP_ENABLED else "")
+
+
+class IngestResult(NamedTuple):
+    file_hash: str
+    pages: List[PageRecord]
+    chunks: List[Tuple[str, str]]
+
+    @property
+    def full_text(self) -> str:
+        return extract_text_from_pdf(None, pages=self.pages)
+
+
+def hash_stream(fileobj: BinaryIO) -> str:
+    """
+    MD5 of an upload read in fixed-size blocks, leaving the stream rewound for the parser
+    """
+    digest = hashlib.md5()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _dedup(chunks: List[Tuple[str, str]], stats: dict) -> List[Tuple[str, str]]:
+    before = len(chunks)
+    chunks = dedup_chunks(chunks, stats=stats)
+    stats["chunks"] = len(chunks)
+    stats["tokens_removed"] = stats.get("boilerplate_tokens", 0) + stats["duplicate_tokens"]
+    print(f"[Dedup] {stats.get('boilerplate_blocks', 0)} repeated blocks and {stats['duplicate_chunks']}/{before} "
+          f"duplicate sections removed; {stats['tokens_removed']} tokens not embedded")
+    return chunks
+
+
+def ingest_pdf(pdf_path: str, file_hash: Optional[str] = None, workers: Optional[int] = None,
+               stats: Optional[dict] = None) -> IngestResult:
+    """
+    Parsing the PDF once into per-page records and chunking from those records.
+    Running headers, footers and notices are dropped before chunking and duplicate sections
+    after it (see dedup.py). Oversized sections are split so no chunk exceeds SECTION_MAX_TOKENS.
+    """
+    if file_hash is None:
+        with open(pdf_path, "rb") as f:
+            file_hash = hash_stream(f)
+    try:
+        pages = extract_page_records(pdf_path, workers=workers)
+    except Exception as e:
+        print(f"[Fallback] Using unstructured: {e}")
+        chunks = split_oversized_sections(unstructured_fallback(pdf_path))
+        return IngestResult(file_hash, [], _dedup(chunks, stats if stats is not None else {}) if DEDUP_ENABLED else chunks)
+    return IngestResult(file_hash, pages, chunks_from_pages(pages, pdf_path, stats=stats))
+
+
+def chunks_from_pages(pages: List[PageRecord], pdf_path: str, stats: Optional[dict] = None) -> List[Tuple[str, str]]:
+    """
+    Chunking parsed pages; pdf_path is only re-read if the unstructured fallback is needed
+    """
+    if not DEDUP_ENABLED:
+        return split_oversized_sections(chunk_pages(pages, pdf_path))
+    stats = stats if stats is not None else {}
+    # The full pages stay with the caller for full-text consumers; only the chunker sees the stripped ones
+    chunks = split_oversized_sections(chunk_pages(strip_repeated_blocks(pages, stats=stats), pdf_path))
+    return _dedup(chunks, stats)
+
+
+def stream_sections(pdf_path: str, pages: List[PageRecord], warmup_pages: int = STREAM_WARMUP_PAGES) -> Iterator[Tuple[str, str]]:
+    """
+    Yielding provisional sections while the PDF is still being parsed, appending every parsed page
+    to pages. The header font threshold, bold detection and running headers/footers are learned
+    from the first warmup_pages pages, so the sections can differ slightly from chunks_from_pages
+    over the whole document, which remains the stored result.
+    """
+    page_records = iter_page_records(pdf_path)
+    pages.extend(itertools.islice(page_records, warmup_pages))
+    boilerplate = find_boilerplate(pages) if DEDUP_ENABLED else {}
+
+    def page_blocks(page):
+        return [block for block, position in zip(page.blocks, page.positions)
+                if not is_boilerplate(block.text, position, boilerplate)]
+
+    window = [block for page in pages for block in page_blocks(page)]
+    bold_supported = any(page.bold_detected for page in pages)
+
+    def blocks():
+        yield from window
+        for page in page_records:
+            pages.append(page)
+            yield from page_blocks(page)
+
+    for section in iter_sections(blocks(), bold_supported, font_size_threshold(window)):
+        yield from split_oversized_sections([section])
+
+
+def ingest_upload(fileobj: BinaryIO, file_hash: Optional[str] = None, workers: Optional[int] = None,
+                  stats: Optional[dict] = None) -> IngestResult:
+    """
+    Spooling an upload to a temp file only for the duration of the parse, then removing it
+    """
+    if file_hash is None:
+        file_hash = hash_stream(fileobj)
+    with spooled_pdf(fileobj) as pdf_path:
+        return ingest_pdf(pdf_path, file_hash=file_hash, workers=workers, stats=stats)
+
+
+@contextmanager
+def spooled_pdf(fileobj: BinaryIO) -> Iterator[str]:
+    """
+    Copying an upload to a temp file for parsers that need a path, removed on exit
+    """
+    fileobj.seek(0)
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    try:
+        with tmp:
+            shutil.copyfileobj(fileobj, tmp, HASH_BLOCK_SIZE)
+        yield tmp.name
+    finally:
+        fileobj.seek(0)
+        os.remove(tmp.name)
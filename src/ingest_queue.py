@@ -0,0 +1,308 @@
+import io
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ingest import hash_stream, ingest_upload, spooled_pdf, stream_sections, chunks_from_pages, CHUNKS_VERSION
+from visual_chunker import count_pdf_pages
+from vector_store import build_faiss_index, embed_texts, make_index, embedding_model_id, INDEX_TYPE
+from embedding_providers import get_embedding_provider
+from lexical_index import BM25Index
+from artifact_store import artifact_key, has_artifacts, load_artifacts, save_artifacts
+from index_cache import IndexCache
+from perf import span, count
+
+# Uploads parsed and embedded at the same time; embedding calls share the pooled client's limit
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# On: sections are embedded as pages are parsed and a partial tender is searchable before the rest is done
+PROGRESSIVE_INGEST = os.getenv("PROGRESSIVE_INGEST", "1") != "0"
+# Streamed sections sent to the embedder per call (the first one is sent alone to open the preview)
+STREAM_EMBED_BATCH = int(os.getenv("STREAM_EMBED_BATCH", "16"))
+
+# status -> progress shown while a job is in that stage
+STAGES = {
+    "queued": 0.0,
+    "loading": 0.05,
+    "parsing": 0.1,
+    "streaming": 0.1,
+    "embedding": 0.5,
+    "finalizing": 0.85,
+    "indexing": 0.9,
+    "ready": 1.0,
+    "failed": 1.0,
+}
+
+
+class IngestJob:
+    """
+    One tender being prepared in the background, identified by its content hash.
+    The prepared chunks and indexes live in the queue's IndexCache, not on the job;
+    only the partial preview of a tender still streaming is held here.
+    """
+
+    def __init__(self, file_hash: str, name: str):
+        self.file_hash = file_hash
+        self.name = name
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.sections = 0
+        self.dedup_stats: dict = {}
+        self.embed_stats: dict = {}
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.pages_done = 0
+        self.total_pages = 0
+        self._preview: Optional[dict] = None
+        self._done = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        if self.status == "streaming" and self.total_pages:
+            width = STAGES["finalizing"] - STAGES["streaming"]
+            return STAGES["streaming"] + width * min(1.0, self.pages_done / self.total_pages)
+        return STAGES[self.status]
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.time()) - self.submitted
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def preview(self) -> Optional[dict]:
+        """
+        The sections embedded so far while the tender streams, as a document dict with
+        "partial": True, "pages" (pages covered) and a "lock" to hold while searching its
+        indexes, which keep growing. None before the first batch and once the job is done.
+        """
+        return self._preview
+
+
+class IngestQueue:
+    """
+    Process-wide pool that parses, embeds and indexes every uploaded tender as soon as it arrives.
+    Jobs are keyed by file hash, so the same PDF uploaded twice, in any session, is processed once.
+    on_ready(job, chunks, index, vectors) runs in the worker once a job's artifacts are available;
+    calls are serialised, so it can update shared state such as the corpus index.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS,
+                 on_ready: Optional[Callable[[IngestJob, list, object, object], None]] = None,
+                 cache: Optional[IndexCache] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest")
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+        self._ready_lock = threading.Lock()
+        self.on_ready = on_ready
+        self.cache = cache if cache is not None else IndexCache()
+
+    def submit(self, fileobj: BinaryIO, name: str, file_hash: Optional[str] = None, retry: bool = False) -> IngestJob:
+        """
+        Queueing an upload unless its hash is already queued, running, ready or failed. A failed job
+        keeps its error and is only queued again with retry=True; ready ones are re-queued if their
+        artifacts have since left both memory and disk.
+        """
+        if file_hash is None:
+            file_hash = hash_stream(fileobj)
+        with self._lock:
+            job = self._jobs.get(file_hash)
+            if job is not None:
+                evicted = job.status == "ready" and not self._available(file_hash)
+                # Resubmitting on every rerun must not parse and embed an upload that always fails
+                if not evicted and (job.status != "failed" or not retry):
+                    return job
+            job = IngestJob(file_hash, name)
+            self._jobs[file_hash] = job
+        # The worker gets its own copy; the upload object belongs to the session that sent it
+        fileobj.seek(0)
+        data = fileobj.read()
+        fileobj.seek(0)
+        self._executor.submit(self._run, job, data)
+        print(f"[Ingest] Queued {name} ({file_hash[:8]})")
+        return job
+
+    def get(self, file_hash: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(file_hash)
+
+    def document(self, file_hash: str) -> Optional[dict]:
+        """
+        Returning a ready tender's chunks, index and lexical index from memory, reloading it
+        (memory-mapped) from the artifact store if it was evicted
+        """
+        doc = self.cache.get(file_hash)
+        if doc is not None:
+            return doc
+        artifacts = load_artifacts(_store_key(file_hash), embedding_id=embedding_model_id())
+        if artifacts is None:
+            return None
+        chunks, index, _ = artifacts
+        doc = _document(chunks, index)
+        self.cache.put(file_hash, doc)
+        return doc
+
+    def _available(self, file_hash: str) -> bool:
+        return file_hash in self.cache or has_artifacts(_store_key(file_hash))
+
+    def jobs(self) -> List[IngestJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job: IngestJob, data: bytes) -> None:
+        start = time.perf_counter()
+        try:
+            with span("ingest", file=job.name):
+                doc = self._prepare(job, data)
+            self.cache.put(job.file_hash, doc)
+            job.sections = len(doc["chunks"])
+            job.status = "ready"
+            print(f"[Ingest] {job.name} ready in {time.perf_counter() - start:.2f}s ({job.sections} sections)")
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            count("ingest_failures")
+            print(f"[Ingest] Failed on {job.name}: {job.error}")
+        finally:
+            job.finished = time.time()
+            job._done.set()
+            job._preview = None
+
+    def _prepare(self, job: IngestJob, data: bytes) -> dict:
+        """
+        Loading the tender's stored artifacts, or parsing, embedding and indexing it on a miss
+        """
+        job.status = "loading"
+        artifacts = None
+        # A local provider that has not been fitted yet has no model id to look up
+        if get_embedding_provider().is_ready:
+            artifacts = load_artifacts(_store_key(job.file_hash), embedding_id=embedding_model_id())
+        count("artifact_cache_hits" if artifacts is not None else "artifact_cache_misses")
+        if artifacts is not None:
+            chunks, index, vectors = artifacts
+        else:
+            streamed = None
+            # A local provider is fitted on the whole tender, so it cannot embed it in parts
+            if PROGRESSIVE_INGEST and get_embedding_provider().is_ready:
+                try:
+                    streamed = self._stream(job, data)
+                except Exception as e:
+                    # Page-by-page parsing failed; the one-pass parse has the unstructured fallback
+                    print(f"[Ingest] Streaming {job.name} failed, parsing it in one pass: {e}")
+                    job._preview = None
+            if streamed is not None:
+                chunks, index, vectors = streamed
+            else:
+                job.status = "parsing"
+                chunks = ingest_upload(io.BytesIO(data), file_hash=job.file_hash, stats=job.dedup_stats).chunks
+                job.status = "embedding"
+                index, vectors = build_faiss_index(chunks, stats=job.embed_stats)
+            job.status = "indexing"
+            store_key = _store_key(job.file_hash)
+            save_artifacts(store_key, chunks, index, vectors, embedding_id=embedding_model_id())
+            # Serving the stored copy, memory-mapped, and letting the freshly built heap index go
+            stored = load_artifacts(store_key, embedding_id=embedding_model_id())
+            if stored is not None:
+                index = stored[1]
+
+        job.status = "indexing"
+        if self.on_ready is not None:
+            with self._ready_lock:
+                self.on_ready(job, chunks, index, vectors)
+        return _document(chunks, index)
+
+    def _stream(self, job: IngestJob, data: bytes):
+        """
+        Parsing page by page and embedding sections in micro-batches as they complete, publishing
+        a searchable preview after the first pages. The stored result is then chunked over the
+        whole document; streamed vectors are reused for every section that came out the same.
+        """
+        streamed: Dict[str, np.ndarray] = {}
+        # One embedding call in flight while parsing goes on; a single worker keeps batches in order
+        embedder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-embed")
+        with spooled_pdf(io.BytesIO(data)) as pdf_path:
+            job.total_pages = count_pdf_pages(pdf_path)
+            job.status = "streaming"
+            pages = []
+            batch = []
+            batches = []
+            seen = set()
+            try:
+                for section in stream_sections(pdf_path, pages):
+                    job.pages_done = len(pages)
+                    # Repeated sections are embedded once; the final pass drops them from the tender
+                    if section[1] in seen:
+                        continue
+                    seen.add(section[1])
+                    batch.append(section)
+                    if len(batch) >= STREAM_EMBED_BATCH or not batches:
+                        batches.append(embedder.submit(self._extend_preview, job, batch, streamed, len(pages)))
+                        batch = []
+                if batch:
+                    batches.append(embedder.submit(self._extend_preview, job, batch, streamed, len(pages)))
+            finally:
+                embedder.shutdown(wait=True)
+            for future in batches:
+                future.result()
+
+            job.status = "finalizing"
+            chunks = chunks_from_pages(pages, pdf_path, stats=job.dedup_stats)
+        missing = [chunk for chunk in chunks if chunk[1] not in streamed]
+        if missing:
+            embed_stats = {}
+            streamed.update(zip((content for _, content in missing), embed_texts(missing, stats=embed_stats)))
+            _add_embed_stats(job.embed_stats, embed_stats)
+        print(f"[Ingest] {job.name}: reused {len(chunks) - len(missing)}/{len(chunks)} streamed vectors")
+        vectors = np.stack([streamed[content] for _, content in chunks])
+        return chunks, make_index(vectors), vectors
+
+    def _extend_preview(self, job: IngestJob, batch: list, streamed: dict, pages: int) -> None:
+        embed_stats = {}
+        vectors = embed_texts(batch, stats=embed_stats)
+        _add_embed_stats(job.embed_stats, embed_stats)
+        streamed.update(zip((content for _, content in batch), vectors))
+        preview = job._preview
+        chunks = (preview["chunks"] if preview is not None else []) + batch
+        if preview is None:
+            job._preview = {"chunks": chunks, "index": make_index(vectors, "flat_ip"), "lexical": BM25Index(batch),
+                            "lock": threading.Lock(), "pages": pages, "partial": True}
+            return
+        # Readers keep the chunk list they took and skip ids past it; the FAISS and BM25 indexes
+        # grow in place, by this batch only, under the lock searches also take
+        with preview["lock"]:
+            preview["index"].add(vectors)
+            preview["lexical"].extend(batch)
+        job._preview = {**preview, "chunks": chunks, "pages": pages}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def _store_key(file_hash: str) -> str:
+    return artifact_key(file_hash, CHUNKS_VERSION, embedding_model_id(), INDEX_TYPE)
+
+
+def _add_embed_stats(total: dict, part: dict) -> None:
+    # Summing embed_texts throughput over the micro-batches of one streamed tender
+    for key in ("chunks", "tokens", "batches", "seconds", "cache_hits", "cache_misses", "duplicate_chunks",
+                "api_tokens", "cache_tokens_saved", "duplicate_tokens_saved"):
+        total[key] = total.get(key, 0) + part[key]
+    total["provider"] = part["provider"]
+    total["chunks_per_s"] = total["chunks"] / total["seconds"] if total["seconds"] else 0.0
+    total["tokens_per_s"] = total["tokens"] / total["seconds"] if total["seconds"] else 0.0
+    total["cache_hit_rate"] = total["cache_hits"] / total["chunks"] if total["chunks"] else 0.0
+
+
+def _document(chunks: list, index) -> dict:
+    # Keyword index over the same chunks for hybrid and keyword-only retrieval
+    with span("bm25_build"):
+        lexical = BM25Index(chunks)
+    # The index already holds the vectors; no second copy is kept
+    return {"chunks": chunks, "index": index, "lexical": lexical}
@@ -0,0 +1,119 @@
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Keeps reference numbers, CPV codes and dotted clause numbers ("45000000-7", "3.2.1", "ISO/IEC") as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[./-][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was what when "
+    "where which who will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process inverted index over (title, content) chunks, scored with Okapi BM25.
+    extend() appends chunks without re-reading the ones already indexed.
+    """
+
+    def __init__(self, chunks: List[Tuple[str, str]] = (), k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = 0
+        self._lengths: List[int] = []
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # (position, tf) entries added since a term's arrays were last built
+        self._pending: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._norm = np.zeros(0, dtype=np.float32)
+        self.extend(chunks)
+        # A finished index is read-only from here on, so concurrent searches never write to it
+        self._merge(list(self._pending))
+        self._length_norm()
+
+    def extend(self, chunks: List[Tuple[str, str]]) -> None:
+        """
+        Indexing chunks at the next positions, at a cost proportional to the new chunks only.
+        Not safe to call while another thread searches; callers share a lock for that.
+        """
+        for title, content in chunks:
+            tokens = tokenize(f"{title}\n{content}")
+            for term, tf in Counter(tokens).items():
+                self._pending[term].append((self.n_docs, tf))
+            self._lengths.append(len(tokens))
+            self.n_docs += 1
+
+    def _merge(self, terms) -> None:
+        # Folding a term's pending entries into its arrays, only once a query needs them
+        for term in terms:
+            entries = self._pending.pop(term, None)
+            if not entries:
+                continue
+            doc_ids = np.fromiter((d for d, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            if term in self._postings:
+                old_ids, old_tfs = self._postings[term]
+                doc_ids, tfs = np.concatenate([old_ids, doc_ids]), np.concatenate([old_tfs, tfs])
+            self._postings[term] = (doc_ids, tfs)
+
+    def _length_norm(self) -> np.ndarray:
+        # Length normalisation is per document and depends on the average length, so it is
+        # recomputed only when chunks were added since the last search
+        if len(self._norm) != self.n_docs:
+            lengths = np.asarray(self._lengths, dtype=np.float32)
+            avg_length = float(lengths.mean()) if self.n_docs else 0.0
+            self._norm = self.k1 * (1 - self.b + self.b * lengths / (avg_length or 1.0))
+        return self._norm
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @property
+    def nbytes(self) -> int:
+        arrays = sum(ids.nbytes + tfs.nbytes for ids, tfs in self._postings.values())
+        # Pending entries are small Python tuples, roughly 8 bytes of array data each once merged
+        pending = sum(len(entries) for entries in self._pending.values()) * 8
+        return arrays + pending + self._norm.nbytes
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Returning up to k (chunk position, score) pairs, best first; chunks sharing no term are skipped
+        """
+        terms = set(tokenize(query))
+        if self._pending:
+            self._merge(terms)
+        norm = self._length_norm()
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in terms:
+            entry = self._postings.get(term)
+            if entry is None:
+                continue
+            doc_ids, tfs = entry
+            idf = math.log(1 + (self.n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            scores[doc_ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[doc_ids])
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+        if matched.size > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(i), float(scores[i])) for i in order]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 10, rrf_k: int = 60) -> List[int]:
+    """
+    Fusing ranked id lists: score(id) = sum over lists of 1 / (rrf_k + rank)
+    """
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (rrf_k + rank)
+    return sorted(scores, key=lambda item: (-scores[item], item))[:k]
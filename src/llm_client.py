@@ -0,0 +1,250 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+import httpx2
+import openai
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpx2Client
+
+from perf import count
+
+load_dotenv()
+
+# Pooled HTTP transport shared by every embedding and chat call in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "16"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
+# Requests in flight across all sessions and callers at once
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "6"))
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+T = TypeVar("T")
+
+
+# ------------------------------------------
+# 1. Shared client on a dedicated event loop
+# ------------------------------------------
+class _ClientLoop:
+    """
+    One AsyncOpenAI client and its connection pool live on a background event loop thread.
+    Sync callers (Streamlit reruns, thread pools) and other event loops hand coroutines to it,
+    so every caller shares the same connections and the same concurrency limit.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="openai-client-loop", daemon=True)
+        self._thread.start()
+        self.client = self.run(self._create_client())
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "in_flight": 0}
+
+    async def _create_client(self) -> AsyncOpenAI:
+        # Built on the loop that will use it; the semaphore must belong to the same loop
+        self.semaphore = asyncio.Semaphore(max(1, OPENAI_MAX_CONCURRENCY))
+        http_client = DefaultAsyncHttpx2Client(
+            limits=httpx2.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                 max_keepalive_connections=OPENAI_MAX_KEEPALIVE),
+            timeout=httpx2.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT),
+        )
+        # Retries are handled by with_retries so rate-limit backoff is applied once, not twice
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, http_client=http_client)
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T]) -> T:
+        return self.submit(coro).result()
+
+
+_client_loop: Optional[_ClientLoop] = None
+_client_lock = threading.Lock()
+
+
+def _get_client_loop() -> _ClientLoop:
+    global _client_loop
+    with _client_lock:
+        if _client_loop is None:
+            _client_loop = _ClientLoop()
+        return _client_loop
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Returning the process-wide AsyncOpenAI client; only await it from coroutines passed to run_sync/run_async
+    """
+    return _get_client_loop().client
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Running a coroutine on the shared client loop and blocking until it finishes
+    """
+    return _get_client_loop().run(coro)
+
+
+async def run_async(coro: Awaitable[T]) -> T:
+    """
+    Awaiting a coroutine on the shared client loop from a different event loop
+    """
+    return await asyncio.wrap_future(_get_client_loop().submit(coro))
+
+
+def client_stats() -> dict:
+    return dict(_get_client_loop().stats)
+
+
+# ------------------------------------------
+# 2. Concurrency limit and retry
+# ------------------------------------------
+def retry_after_seconds(error) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, error=None) -> float:
+    """
+    Seconds to wait before retry number attempt+1: the server's retry-after if given, else
+    exponential backoff, plus up to 50% jitter so concurrent callers do not retry in lockstep
+    """
+    delay = retry_after_seconds(error) if error is not None else None
+    if delay is None:
+        delay = min(30.0, 0.5 * (2 ** attempt))
+    return delay + random.uniform(0, delay / 2)
+
+
+async def with_retries(call: Callable[[], Awaitable[T]], max_retries: int = OPENAI_MAX_RETRIES,
+                       stats: Optional[dict] = None) -> T:
+    """
+    Awaiting call() under the global concurrency limit, retrying transient failures.
+    The slot is released while backing off so other requests can use it.
+    """
+    state = _get_client_loop()
+    for attempt in range(max_retries + 1):
+        async with state.semaphore:
+            state.stats["requests"] += 1
+            state.stats["in_flight"] += 1
+            count("openai_requests")
+            try:
+                return await call()
+            except RETRYABLE_ERRORS as e:
+                error = e
+                if attempt == max_retries:
+                    state.stats["failures"] += 1
+                    count("openai_failures")
+                    raise
+            finally:
+                state.stats["in_flight"] -= 1
+        state.stats["retries"] += 1
+        count("openai_retries")
+        if stats is not None:
+            stats["retries"] = stats.get("retries", 0) + 1
+        await asyncio.sleep(backoff_delay(attempt, error))
+
+
+# ------------------------------------------
+# 3. Embeddings and chat
+# ------------------------------------------
+async def aembed(texts: List[str], model: str, dimensions: Optional[int] = None,
+                 stats: Optional[dict] = None) -> List[List[float]]:
+    """
+    Embedding one batch of texts, returned in input order
+    """
+    extra = {"dimensions": dimensions} if dimensions else {}
+    client = get_async_client()
+    response = await with_retries(lambda: client.embeddings.create(input=texts, model=model, **extra), stats=stats)
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+async def aembed_batches(batches: List[List[str]], model: str, dimensions: Optional[int] = None,
+                         concurrency: int = OPENAI_MAX_CONCURRENCY, stats: Optional[dict] = None) -> List[List[List[float]]]:
+    """
+    Embedding several batches concurrently, at most concurrency at once for this call
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(texts):
+        async with limit:
+            return await aembed(texts, model, dimensions, stats=stats)
+
+    return await asyncio.gather(*(one(texts) for texts in batches))
+
+
+async def achat(prompt: str, model: str, temperature: float, stats: Optional[dict] = None) -> Tuple[str, Optional[int]]:
+    """
+    One blocking chat completion; returns (answer, completion tokens if reported)
+    """
+    client = get_async_client()
+    response = await with_retries(lambda: client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+    ), stats=stats)
+    usage = getattr(response, "usage", None)
+    return response.choices[0].message.content or "", usage.completion_tokens if usage is not None else None
+
+
+async def astream_chat(prompt: str, model: str, temperature: float) -> AsyncIterator[object]:
+    """
+    Streaming chat events. Only opening the stream is retried; a stream that fails midway raises.
+    """
+    client = get_async_client()
+    stream = await with_retries(lambda: client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    ))
+    async with stream:
+        async for event in stream:
+            yield event
+
+
+def stream_chat(prompt: str, model: str, temperature: float) -> Iterator[object]:
+    """
+    Sync wrapper over astream_chat for the Streamlit path: events are pulled from the shared loop one at a time
+    """
+    state = _get_client_loop()
+    events = astream_chat(prompt, model, temperature)
+    try:
+        while True:
+            try:
+                yield state.run(events.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        # Closing early (e.g. the script was rerun) releases the connection back to the pool
+        state.run(events.aclose())
+
+
+def embed_batches(batches: List[List[str]], model: str, dimensions: Optional[int] = None,
+                  concurrency: int = OPENAI_MAX_CONCURRENCY, stats: Optional[dict] = None) -> List[List[List[float]]]:
+    return run_sync(aembed_batches(batches, model, dimensions, concurrency, stats))
+
+
+if __name__ == "__main__":
+    # Smoke test against whatever OPENAI_BASE_URL points at (e.g. benchmarks/fake_openai_server.py)
+    start = time.perf_counter()
+    vectors = embed_batches([["hello"], ["tender"], ["deadline"]], "text-embedding-3-large", 8)
+    print(f"{len(vectors)} batches embedded in {time.perf_counter() - start:.3f}s")
+    print("".join(e.choices[0].delta.content or "" for e in stream_chat("Say hi", "gpt-4", 0.0) if e.choices))
+    print(client_stats())
@@ -1,21 +1,124 @@
 from fpdf import FPDF
+import fpdf
 import os
+import threading
+from typing import List, Optional, Sequence, Tuple
 
-def export_response_to_pdf(question: str, answer: str, context_chunks: list[str], filename: str = "response.pdf"):
+from perf import timed
+
+FONT_FAMILY = "Arial"
+FONT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "fonts", "arial.ttf"))
+
+_font_entries = None
+_font_lock = threading.Lock()
+# Reusing registered fonts copies fpdf 1.7.2's internal font tables (pinned in requirements.txt);
+# any other fpdf version registers the font per document through the public add_font instead
+_REUSE_FONT_TABLES = getattr(fpdf, "FPDF_VERSION", None) == "1.7.2"
+
+
+class _GlyphSubset(list):
+    """
+    Code points used by a document, each kept once. fpdf appends every character it writes
+    and at output scans this list once per glyph, which is quadratic in document length.
+    """
+
+    def __init__(self, codes=()):
+        super().__init__(dict.fromkeys(codes))
+        self._seen = set(self)
+
+    def append(self, code) -> None:
+        if code not in self._seen:
+            self._seen.add(code)
+            super().append(code)
+
+    def __contains__(self, code) -> bool:
+        return code in self._seen
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._seen = set(self)
+
+
+def _register_font(pdf: FPDF) -> None:
+    """
+    Adding the Unicode TTF to a document. The font metrics are read from disk once per
+    process; later documents get a copy of the registered entries instead of calling add_font.
+    """
+    global _font_entries
+    if not _REUSE_FONT_TABLES:
+        pdf.add_font(FONT_FAMILY, '', FONT_PATH, uni=True)
+        return
+    with _font_lock:
+        if _font_entries is None:
+            template = FPDF()
+            template.add_font(FONT_FAMILY, '', FONT_PATH, uni=True)
+            _font_entries = (dict(template.fonts), {name: dict(info) for name, info in template.font_files.items()})
+    fonts, font_files = _font_entries
+    for fontkey, entry in fonts.items():
+        # Glyph widths are shared read-only; the subset list is filled per document as text is written
+        pdf.fonts[fontkey] = dict(entry, i=len(pdf.fonts) + 1, subset=_GlyphSubset(entry["subset"]))
+    for name, info in font_files.items():
+        pdf.font_files[name] = dict(info)
+
+
+def _new_document() -> FPDF:
     pdf = FPDF()
     pdf.add_page()
-    font_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "fonts", "arial.ttf"))
-    pdf.add_font('Arial', '', font_path, uni=True)
-    pdf.set_font("Arial", size=12)
+    _register_font(pdf)
+    pdf.set_font(FONT_FAMILY, size=12)
+    return pdf
+
 
+def _write_response(pdf: FPDF, question: str, answer: str, context_chunks: Sequence[Tuple[str, str]],
+                    include_context: bool = True) -> None:
     pdf.multi_cell(0, 10, f"Question:\n{question}\n\n", align='L')
     pdf.multi_cell(0, 10, f"Answer:\n{answer}\n\n", align='L')
-    
-    pdf.multi_cell(0, 10, f"Context Used:\n", align='L')
+    if not include_context:
+        return
+
+    pdf.multi_cell(0, 10, "Context Used:\n", align='L')
     for i, (title, content) in enumerate(context_chunks):
         section_title = f"\n---\nSection {i+1}: {title}\n"
         pdf.multi_cell(0, 10, section_title, align='L')
         pdf.multi_cell(0, 10, content, align='L')
 
-    pdf.output(filename)
-    return filename
\ No newline at end of file
+
+def _to_bytes(pdf: FPDF) -> bytes:
+    # fpdf returns the document as a latin-1 str; nothing touches the disk
+    return pdf.output(dest="S").encode("latin-1")
+
+
+@timed("pdf_export")
+def render_response_pdf(question: str, answer: str, context_chunks: Sequence[Tuple[str, str]]) -> bytes:
+    """
+    Rendering one Q&A with its context sections into PDF bytes in memory
+    """
+    pdf = _new_document()
+    _write_response(pdf, question, answer, context_chunks)
+    return _to_bytes(pdf)
+
+
+@timed("pdf_report")
+def render_report_pdf(items: Sequence[Tuple[str, str, Sequence[Tuple[str, str]]]],
+                      title: Optional[str] = None, include_context: bool = True) -> bytes:
+    """
+    Rendering many (question, answer, context_chunks) items, e.g. a full qualification sheet,
+    into one document in a single pass: one font subset and one output for the whole report
+    """
+    pdf = _new_document()
+    if title:
+        pdf.multi_cell(0, 10, f"{title}\n\n", align='L')
+    for i, (question, answer, context_chunks) in enumerate(items):
+        if i:
+            pdf.add_page()
+        _write_response(pdf, f"{i+1}. {question}", answer, context_chunks, include_context)
+    return _to_bytes(pdf)
+
+
+def export_response_to_pdf(question: str, answer: str, context_chunks: List[Tuple[str, str]], filename: str = "response.pdf"):
+    """
+    Writing the rendered PDF to filename, for callers that need a file on disk
+    """
+    with open(filename, "wb") as f:
+        f.write(render_response_pdf(question, answer, context_chunks))
+    return filename
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+from typing import Dict, List, Optional
+
+# Off: span() returns a shared no-op context, count() returns at once and timed() leaves functions untouched
+PERF_ENABLED = os.getenv("PERF_METRICS", "1") != "0"
+# Most recent spans kept for JSON-lines export
+PERF_MAX_EVENTS = int(os.getenv("PERF_MAX_EVENTS", "2000"))
+PROMETHEUS_PREFIX = "tender"
+
+_NULL_SPAN = nullcontext()
+
+
+class PerfRecorder:
+    """
+    Process-wide timing spans, counters and gauges. Spans are aggregated per name (count, total,
+    max, last) and the most recent ones are kept as events; counters are plain running totals and
+    gauges hold the latest value set.
+    """
+
+    def __init__(self, max_events: int = PERF_MAX_EVENTS):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, dict] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.events = deque(maxlen=max_events)
+
+    def record_span(self, name: str, seconds: float, labels: Optional[dict] = None) -> None:
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {"count": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0}
+            stage["count"] += 1
+            stage["total_s"] += seconds
+            stage["last_s"] = seconds
+            if seconds > stage["max_s"]:
+                stage["max_s"] = seconds
+            self.events.append({"ts": time.time(), "span": name, "seconds": round(seconds, 6), **(labels or {})})
+
+    def add(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.events.clear()
+
+    # ------------------------------------------
+    # Export
+    # ------------------------------------------
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
+    def to_json_lines(self) -> str:
+        """
+        Recent spans one per line, followed by one line with the current counters and gauges
+        """
+        with self._lock:
+            lines = [json.dumps(event) for event in self.events]
+            lines.append(json.dumps({"ts": time.time(), "counters": dict(self.counters), "gauges": dict(self.gauges)}))
+        return "\n".join(lines) + "\n"
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition: one summary per span name, one counter per counter name,
+        one gauge per gauge name
+        """
+        snapshot = self.snapshot()
+        metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {metric} Wall time spent in each pipeline stage.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, stage in sorted(snapshot["stages"].items()):
+            lines.append(f'{metric}_count{{stage="{name}"}} {stage["count"]}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {stage["total_s"]:.6f}')
+        max_metric = f"{PROMETHEUS_PREFIX}_stage_max_seconds"
+        lines += [f"# HELP {max_metric} Slowest single call of each stage.", f"# TYPE {max_metric} gauge"]
+        for name, stage in sorted(snapshot["stages"].items()):
+            lines.append(f'{max_metric}{{stage="{name}"}} {stage["max_s"]:.6f}')
+        for name, value in sorted(snapshot["counters"].items()):
+            counter = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}_total"
+            lines += [f"# TYPE {counter} counter", f"{counter} {value:g}"]
+        for name, value in sorted(snapshot["gauges"].items()):
+            gauge_name = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}"
+            lines += [f"# TYPE {gauge_name} gauge", f"{gauge_name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name.lower())
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: Optional[dict]):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels
+        if exc_type is not None:
+            labels = {**(labels or {}), "error": exc_type.__name__}
+        recorder.record_span(self.name, time.perf_counter() - self.start, labels)
+        return False
+
+
+recorder = PerfRecorder()
+
+
+# ------------------------------------------
+# Instrumentation API
+# ------------------------------------------
+def span(name: str, **labels):
+    """
+    Timing a block: `with span("embed"): ...`
+    """
+    if not PERF_ENABLED:
+        return _NULL_SPAN
+    return _Span(name, labels or None)
+
+
+def timed(name: str):
+    """
+    Timing every call of a function as one span
+    """
+    def decorate(func):
+        if not PERF_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """
+    Recording a span measured elsewhere, e.g. across the yields of a generator
+    """
+    if PERF_ENABLED:
+        recorder.record_span(name, seconds, labels or None)
+
+
+def count(name: str, value: float = 1) -> None:
+    if PERF_ENABLED and value:
+        recorder.add(name, value)
+
+
+def gauge(name: str, value: float) -> None:
+    if PERF_ENABLED:
+        recorder.set(name, value)
+
+
+def stage_rows() -> List[dict]:
+    """
+    Per-stage summary rows for display, slowest total first
+    """
+    rows = []
+    for name, stage in recorder.snapshot()["stages"].items():
+        rows.append({
+            "stage": name,
+            "calls": stage["count"],
+            "last_s": round(stage["last_s"], 4),
+            "mean_s": round(stage["total_s"] / stage["count"], 4),
+            "max_s": round(stage["max_s"], 4),
+            "total_s": round(stage["total_s"], 4),
+        })
+    return sorted(rows, key=lambda row: row["total_s"], reverse=True)
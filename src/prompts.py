@@ -1,3 +1,6 @@
+# Bump when the prompt wording changes so cached answers from the old template are not reused
+PROMPT_TEMPLATE_VERSION = "1"
+
 def build_rag_prompt(context_chunks, user_query):
     context = "\n\n".join(
         f"{i+1}. {title}\n{content.strip()}"
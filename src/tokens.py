@@ -0,0 +1,42 @@
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Without tiktoken, assume ~3 chars/token: dense or non-English text runs well under 4, and an
+# overestimate keeps batches and truncated inputs inside the API's token limits
+FALLBACK_CHARS_PER_TOKEN = 3
+
+_encoding = None
+_warned = False
+
+
+def _get_encoding():
+    global _encoding, _warned
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    if _encoding is None and not _warned:
+        _warned = True
+        print(f"[Tokens] tiktoken is not installed; estimating {FALLBACK_CHARS_PER_TOKEN} chars per token")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counting tokens with tiktoken when available, otherwise a conservative chars/token estimate
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // FALLBACK_CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trimming text to at most max_tokens tokens
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
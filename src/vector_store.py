@@ -1,58 +1,236 @@
 import os
+import time
 from dotenv import load_dotenv
-from typing import List
+from typing import List, Optional
 import faiss
-import openai
-from sklearn.preprocessing import normalize
 import numpy as np
-from openai import OpenAI
 from difflib import SequenceMatcher
+from embedding_cache import chunk_key, get_embedding_cache
+from embedding_providers import get_embedding_provider
+from lexical_index import reciprocal_rank_fusion
+from perf import timed, span, count
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def embed_texts(chunks: List[tuple]) -> np.ndarray:
+# flat_ip | flat_l2 | sq_fp16 | hnsw | ivfpq
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat_ip")
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+# IVF-PQ needs enough vectors to train its coarse and product quantizers
+IVFPQ_MIN_VECTORS = 4096
+
+# semantic | hybrid | keyword (keyword skips the query-embedding round trip)
+RETRIEVAL_MODES = ("semantic", "hybrid", "keyword")
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+
+def embedding_model_id() -> str:
+    """
+    Naming the active vector space (provider, model, dimension) for cache keys and index records
+    """
+    return get_embedding_provider().model_id
+
+
+@timed("embed")
+def embed_texts(chunks: List[tuple], stats: Optional[dict] = None) -> np.ndarray:
     """
-    Getting OpenAI embeddings for a list of (title, text) chunks and return as numpy array
+    Getting embeddings from the configured provider for a list of (title, text) chunks and return as numpy array.
+    Chunks already in the embedding cache are reused; only new or changed text is sent to the provider
+    (for OpenAI: token-bounded batches sent concurrently). Output order matches input.
     """
-    texts = [text for _, text in chunks]  # Extracting only the text part from the tuples
-    response = client.embeddings.create(
-        input=texts,  # list of strings
-        model="text-embedding-3-large"
+    provider = get_embedding_provider()
+    texts = [provider.prepare(text) for _, text in chunks]  # Extracting only the text part from the tuples
+    token_counts = [provider.count_tokens(text) for text in texts]
+    provider.ensure_ready(texts)
+
+    start = time.perf_counter()
+    cache = get_embedding_cache()
+    keys = [chunk_key(provider.model_id, text) for text in texts]
+    cached = cache.get_many(keys) if cache is not None else {}
+
+    embeddings = [cached.get(key) for key in keys]
+    missing = [i for i, vector in enumerate(embeddings) if vector is None]
+    # Identical sections inside one tender are only sent once
+    unique_missing = list({keys[i]: i for i in missing}.values())
+
+    provider_stats = {}
+    fetched = provider.embed(
+        [texts[i] for i in unique_missing], [token_counts[i] for i in unique_missing], stats=provider_stats
     )
-    embeddings = [item.embedding for item in response.data]
-    
+    n_batches = provider_stats.get("batches", 0)
+    fresh = {keys[i]: vector for i, vector in zip(unique_missing, fetched)}
+    for i in missing:
+        embeddings[i] = fresh[keys[i]]
+    if cache is not None and fresh:
+        cache.put_many(fresh)
+    elapsed = time.perf_counter() - start
+
+    total_tokens = sum(token_counts)
+    api_tokens = sum(token_counts[i] for i in unique_missing)
+    hits = len(texts) - len(missing)
+    # Tokens not sent because the cache had them, and because the same text was already in this call
+    cache_tokens_saved = total_tokens - sum(token_counts[i] for i in missing)
+    duplicate_tokens_saved = total_tokens - api_tokens - cache_tokens_saved
+    throughput = {
+        "provider": provider.model_id,
+        "chunks": len(texts),
+        "tokens": total_tokens,
+        "batches": n_batches,
+        "seconds": elapsed,
+        "chunks_per_s": len(texts) / elapsed if elapsed else 0.0,
+        "tokens_per_s": total_tokens / elapsed if elapsed else 0.0,
+        "cache_hits": hits,
+        "cache_misses": len(missing),
+        "cache_hit_rate": hits / len(texts) if texts else 0.0,
+        "duplicate_chunks": len(missing) - len(unique_missing),
+        "api_tokens": api_tokens,
+        "cache_tokens_saved": cache_tokens_saved,
+        "duplicate_tokens_saved": duplicate_tokens_saved,
+    }
+    if stats is not None:
+        stats.update(throughput)
+    count("embed_chunks", len(texts))
+    count("embed_cache_hits", hits)
+    count("embed_cache_misses", len(missing))
+    count("embed_api_batches", n_batches)
+    count("embed_api_tokens", api_tokens)
+    count("embed_cache_tokens_saved", cache_tokens_saved)
+    count("embed_duplicate_tokens_saved", duplicate_tokens_saved)
+    print(f"[Embeddings] {provider.model_id}: {len(texts)} chunks / {total_tokens} tokens in {n_batches} batches, "
+          f"{elapsed:.2f}s ({throughput['chunks_per_s']:.1f} chunks/s, {throughput['tokens_per_s']:.0f} tokens/s); "
+          f"cache hit rate {throughput['cache_hit_rate']:.0%} ({cache_tokens_saved} tokens saved), "
+          f"{throughput['duplicate_chunks']} repeated chunks sent once ({duplicate_tokens_saved} tokens saved)")
+
     # Normalizing vectors
-    embeddings = np.array(embeddings)
-    return normalize(embeddings)
+    embeddings = np.array(embeddings, dtype=np.float32).reshape(len(texts), -1)
+    return normalize_rows(embeddings)
 
-def build_faiss_index(chunks: List[str]):
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
     """
-    Embedding the text chunks and build a FAISS index
+    L2-normalising float32 rows in place, so inner product equals cosine similarity
     """
-    vectors = embed_texts(chunks)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
 
-    dimension = vectors.shape[1]
-    index = faiss.IndexFlatL2(dimension)
+def _largest_divisor(n: int, limit: int) -> int:
+    return max(m for m in range(1, limit + 1) if n % m == 0)
+
+@timed("index_build")
+def make_index(vectors: np.ndarray, index_type: str = None):
+    """
+    Building a FAISS index of the requested type over normalised float32 vectors.
+    Types that need training fall back to exact inner-product search on small inputs.
+    """
+    index_type = index_type or INDEX_TYPE
+    n, dimension = vectors.shape
+
+    if index_type == "flat_l2":
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == "sq_fp16":
+        # Exact scan over float16 codes: half the memory of flat_ip
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "ivfpq" and n >= IVFPQ_MIN_VECTORS:
+        nlist = int(min(4 * np.sqrt(n), n // 39))
+        m = _largest_divisor(dimension, 64)
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, m, 8, faiss.METRIC_INNER_PRODUCT)
+    elif index_type in ("flat_ip", "ivfpq"):
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    if not index.is_trained:
+        index.train(vectors)
     index.add(vectors)
+    return index
+
+def _apply_search_params(index) -> None:
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = IVF_NPROBE
+
+def build_faiss_index(chunks: List[str], stats: Optional[dict] = None, index_type: str = None):
+    """
+    Embedding the text chunks and build a FAISS index
+    """
+    vectors = embed_texts(chunks, stats=stats)
+    index = make_index(vectors, index_type)
 
     return index, vectors
 
+@timed("embed_query")
+def embed_query(query: str) -> np.ndarray:
+    """
+    Embedding a user query as a (1, d) float32 row, reusing the embedding cache across reruns
+    """
+    # Queries never fit a model: an unfitted local provider raises here instead
+    provider = get_embedding_provider()
+    text = provider.prepare(query)
+    cache = get_embedding_cache()
+    key = chunk_key(provider.model_id, text)
+    vector = cache.get_many([key]).get(key) if cache is not None else None
+    count("query_embed_cache_hits" if vector is not None else "query_embed_cache_misses")
+    if vector is None:
+        vector = provider.embed([text])[0]
+        if cache is not None:
+            cache.put_many({key: vector})
+    return normalize_rows(vector.reshape(1, -1))
+
+@timed("faiss_search")
+def search_faiss_ids(index, query_vector: np.ndarray, k: int = 10) -> List[int]:
+    """
+    Returning the positions of the top-k chunks for an already-embedded query
+    """
+    if query_vector.shape[1] != index.d:
+        raise ValueError(
+            f"Query embedding has {query_vector.shape[1]} dimensions but the index was built with {index.d}; "
+            "it was built by a different embedding provider."
+        )
+    _apply_search_params(index)
+    distances, indices = index.search(query_vector, k)
+    # FAISS pads with -1 when k exceeds the number of indexed chunks
+    return [int(i) for i in indices[0] if i >= 0]
+
+def hybrid_search_ids(query: str, index, lexical_index, k: int = 10, mode: str = None,
+                      query_vector: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Retrieving top-k chunk positions by dense search, BM25, or both fused with reciprocal rank fusion
+    """
+    mode = mode or RETRIEVAL_MODE
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode}")
+
+    lexical_ids = []
+    if mode != "semantic":
+        with span("bm25_search"):
+            lexical_ids = [i for i, _ in lexical_index.search(query, k)]
+    if mode == "keyword":
+        return lexical_ids
+
+    if query_vector is None:
+        query_vector = embed_query(query)
+    dense_ids = search_faiss_ids(index, query_vector, k)
+    if mode == "semantic" or not lexical_ids:
+        return dense_ids
+    return reciprocal_rank_fusion([dense_ids, lexical_ids], k=k)
+
 def search_faiss_index(query: str, index, chunks: List[str], k: int = 10) -> List[str]:
     """
     Searching the FAISS index with a user query and return top-k relevant chunks
     """
     # Embedding the query
-    response = client.embeddings.create(
-        input=[query],
-        model="text-embedding-3-large"
-    )
-    query_vector = np.array(response.data[0].embedding).reshape(1, -1)
+    query_vector = embed_query(query)
 
     # Step 2: Search FAISS
-    distances, indices = index.search(query_vector, k)
+    indices = search_faiss_ids(index, query_vector, k)
 
     # Step 3: Retrieve matching chunks
-    results = [chunks[i] for i in indices[0]]
+    results = [chunks[i] for i in indices]
     return results
-
@@ -1,6 +1,13 @@
-from typing import List, Tuple
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional, NamedTuple
+
+import numpy as np
 from pdfminer.high_level import extract_pages
 from pdfminer.layout import LTTextContainer, LTChar
+from pdfminer.pdfpage import PDFPage
+
+from perf import timed, count
 
 try:
     from unstructured.partition.pdf import partition_pdf
@@ -10,48 +17,173 @@ except ImportError:
 import streamlit as st
 import re
 
+# Bump whenever a change here alters the chunks produced for the same PDF,
+# so persisted artifacts built by an older chunker are not reused.
+CHUNKER_VERSION = "1"
+
 # ------------------------------------------
 # 1. Extract layout-aware blocks using pdfminer
 # ------------------------------------------
-def extract_layout_blocks(pdf_path: str) -> Tuple[List[Tuple[float, float, str]], bool]:
+LAYOUT_WORKERS = int(os.getenv("LAYOUT_WORKERS", "1"))
+# Below this many pages a process pool costs more than it saves
+MIN_PAGES_PER_WORKER = 8
+
+
+class LayoutBlock(NamedTuple):
+    """
+    One text container: rounded-up average font size, share of bold characters, and text.
+    A tuple subclass with no per-instance dict, so it still unpacks and compares like (size, bold_ratio, text).
+    """
+    size: int
+    bold_ratio: float
+    text: str
+
+
+class PageRecord(NamedTuple):
+    """
+    One parsed page, shared by the chunker and full-text consumers so the PDF is only parsed once.
+    positions holds each block's vertical centre as a fraction of page height, 0 at the top.
+    """
+    page_number: int
+    blocks: List[LayoutBlock]
+    bold_detected: bool
+    positions: Tuple[float, ...] = ()
+
+    @property
+    def text(self) -> str:
+        return "\n".join(text for _, _, text in self.blocks)
+
+
+def _page_blocks(page_layout, bold_fonts: Optional[Dict[str, bool]] = None,
+                 positions: Optional[List[float]] = None) -> Tuple[List[LayoutBlock], bool]:
+    # Running sums instead of per-character lists; bold is decided once per font name
+    if bold_fonts is None:
+        bold_fonts = {}
+    height = getattr(page_layout, "height", 0) or 1.0
     blocks = []
     bold_detected = False
-    for page_layout in extract_pages(pdf_path):
-        for element in page_layout:
-            if isinstance(element, LTTextContainer):
-                text = element.get_text().strip()
-                if not text:
-                    continue
-                font_sizes = []
-                bold_flags = []
-                for line in element:
-                    for char in line:
-                        if isinstance(char, LTChar):
-                            font_sizes.append(char.size)
-                            is_bold = "bold" in char.fontname.lower()
-                            bold_flags.append(is_bold)
-                            if is_bold:
-                                bold_detected = True
-                avg_size = (int(sum(font_sizes) / len(font_sizes)) + 1) if font_sizes else 0
-                bold_ratio = sum(bold_flags) / len(bold_flags) if bold_flags else 0
-                blocks.append((avg_size, bold_ratio, text))
+    for element in page_layout:
+        if isinstance(element, LTTextContainer):
+            text = element.get_text().strip()
+            if not text:
+                continue
+            size_sum = 0
+            n_chars = 0
+            n_bold = 0
+            for line in element:
+                for char in line:
+                    if isinstance(char, LTChar):
+                        size_sum += char.size
+                        n_chars += 1
+                        is_bold = bold_fonts.get(char.fontname)
+                        if is_bold is None:
+                            is_bold = bold_fonts[char.fontname] = "bold" in char.fontname.lower()
+                        if is_bold:
+                            n_bold += 1
+            if n_bold:
+                bold_detected = True
+            avg_size = (int(size_sum / n_chars) + 1) if n_chars else 0
+            bold_ratio = n_bold / n_chars if n_chars else 0
+            blocks.append(LayoutBlock(avg_size, bold_ratio, text))
+            if positions is not None:
+                positions.append(round(1 - (element.y0 + element.y1) / 2 / height, 4))
+    return blocks, bold_detected
+
+
+def _extract_page_range(pdf_path: str, page_numbers: Optional[List[int]] = None) -> List[PageRecord]:
+    pages = []
+    bold_fonts = {}
+    for i, page_layout in enumerate(extract_pages(pdf_path, page_numbers=page_numbers)):
+        positions = []
+        blocks, bold_detected = _page_blocks(page_layout, bold_fonts, positions)
+        page_number = page_numbers[i] if page_numbers else i
+        pages.append(PageRecord(page_number, blocks, bold_detected, tuple(positions)))
+    return pages
+
+
+def iter_page_records(pdf_path: str) -> Iterator[PageRecord]:
+    """
+    Parsing the PDF lazily, one page record at a time, for progressive ingestion
+    """
+    bold_fonts = {}
+    for page_number, page_layout in enumerate(extract_pages(pdf_path)):
+        positions = []
+        blocks, bold_detected = _page_blocks(page_layout, bold_fonts, positions)
+        yield PageRecord(page_number, blocks, bold_detected, tuple(positions))
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    with open(pdf_path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+@timed("layout")
+def extract_page_records(pdf_path: str, workers: Optional[int] = None) -> List[PageRecord]:
+    """
+    Parsing the PDF once into per-page records. With workers > 1 the page range is split into
+    contiguous slices parsed in a process pool and merged back in page order, identical to the serial path.
+    """
+    workers = LAYOUT_WORKERS if workers is None else workers
+    if workers <= 1:
+        return _extract_page_range(pdf_path)
+
+    n_pages = count_pdf_pages(pdf_path)
+    workers = min(workers, os.cpu_count() or 1, max(1, n_pages // MIN_PAGES_PER_WORKER))
+    if workers <= 1:
+        return _extract_page_range(pdf_path)
+
+    step = -(-n_pages // workers)
+    page_ranges = [list(range(start, min(start + step, n_pages))) for start in range(0, n_pages, step)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_extract_page_range, [pdf_path] * len(page_ranges), page_ranges))
+
+    return [page for part in results for page in part]
+
+
+def blocks_from_pages(pages: List[PageRecord]) -> Tuple[List[LayoutBlock], bool]:
+    blocks = [block for page in pages for block in page.blocks]
+    bold_detected = any(page.bold_detected for page in pages)
     return blocks, bold_detected
 
 
+def extract_layout_blocks(pdf_path: str, workers: Optional[int] = None) -> Tuple[List[LayoutBlock], bool]:
+    return blocks_from_pages(extract_page_records(pdf_path, workers=workers))
+
+
 # ------------------------------------------
 # 2. Classify blocks into (title, content) pairs using font size and boldness
 # ------------------------------------------
-def classify_blocks(blocks: List[Tuple[float, float, str]], bold_supported: bool) -> List[Tuple[str, str]]:
-    font_sizes = [size for size, _, _ in blocks]
-    threshold = sorted(font_sizes)[int(0.85 * len(font_sizes))] if font_sizes else 12
+_SUBHEADING = re.compile(r"^([A-Za-z0-9]+[.)]|\d+\.\d+)")
+NO_CONTENT = "[No content detected after this header.]"
 
-    chunks = []
+
+def font_size_threshold(blocks: List[LayoutBlock], quantile: float = 0.85) -> float:
+    """
+    The font size at the given rank, found by selection (O(n)) rather than sorting every size
+    """
+    if not blocks:
+        return 12
+    sizes = np.fromiter((block[0] for block in blocks), dtype=np.float64, count=len(blocks))
+    k = int(quantile * len(sizes))
+    return np.partition(sizes, k)[k].item()
+
+
+def classify_blocks(blocks: List[LayoutBlock], bold_supported: bool) -> List[Tuple[str, str]]:
+    return list(iter_sections(blocks, bold_supported, font_size_threshold(blocks)))
+
+
+def iter_sections(blocks: Iterable[LayoutBlock], bold_supported: bool, threshold: float) -> Iterator[Tuple[str, str]]:
+    """
+    Yielding each (title, content) section as soon as the header that closes it is seen.
+    blocks may be a generator; threshold and bold_supported must be known up front.
+    """
     current_title = "Untitled Section"
-    current_content = ""
+    # Section text is collected as parts and joined once, not grown by concatenation
+    current_content: List[str] = []
     content_started = False
 
     def is_subheading(text):
-        return bool(re.match(r"^([A-Za-z0-9]+[.)]|\d+\.\d+)", text.strip()))
+        return bool(_SUBHEADING.match(text.strip()))
 
     for size, bold_ratio, text in blocks:
         if bold_supported:
@@ -63,9 +195,9 @@ def classify_blocks(blocks: List[Tuple[float, float, str]], bold_supported: bool
 
         if is_likely_header:
             if content_started:
-                chunks.append((current_title, current_content.strip()))
+                yield current_title, "\n".join(current_content).strip()
                 current_title = text.strip()
-                current_content = ""
+                current_content = []
                 content_started = False
             else:
                 if current_title == "Untitled Section":
@@ -73,25 +205,24 @@ def classify_blocks(blocks: List[Tuple[float, float, str]], bold_supported: bool
                 elif is_subheading(text):
                     current_title = f"{current_title} -> {text.strip()}"
                 else:
-                    chunks.append((current_title, "[No content detected after this header.]"))
+                    yield current_title, NO_CONTENT
                     current_title = text.strip()
-                    current_content = ""
+                    current_content = []
         else:
-            current_content += text + "\n"
+            current_content.append(text)
             content_started = True
 
     if current_title:
-        content_to_save = current_content.strip()
+        content_to_save = "\n".join(current_content).strip()
         if len(content_to_save) < 10:
-            content_to_save = "[No content detected after this header.]"
-        chunks.append((current_title, content_to_save))
-
-    return chunks
+            content_to_save = NO_CONTENT
+        yield current_title, content_to_save
 
 
 # ------------------------------------------
 # 3. Fallback using unstructured
 # ------------------------------------------
+@timed("unstructured_fallback")
 def unstructured_fallback(pdf_path: str) -> List[Tuple[str, str]]:
     if partition_pdf is None:
         print("[Warning] 'unstructured' not available. Using basic fallback.")
@@ -100,19 +231,21 @@ def unstructured_fallback(pdf_path: str) -> List[Tuple[str, str]]:
     elements = partition_pdf(filename=pdf_path)
     chunks = []
     current_title = "Untitled Section"
-    current_content = ""
+    current_content: List[str] = []
 
     for el in elements:
         if el.category == "Title":
-            if current_content.strip():
-                chunks.append((current_title, current_content.strip()))
+            content = "\n".join(current_content).strip()
+            if content:
+                chunks.append((current_title, content))
             current_title = el.text.strip()
-            current_content = ""
+            current_content = []
         else:
-            current_content += el.text + "\n"
+            current_content.append(el.text)
 
-    if current_content.strip():
-        chunks.append((current_title, current_content.strip()))
+    content = "\n".join(current_content).strip()
+    if content:
+        chunks.append((current_title, content))
 
     return chunks
 
@@ -120,9 +253,14 @@ def unstructured_fallback(pdf_path: str) -> List[Tuple[str, str]]:
 # ------------------------------------------
 # 4. Combined chunker (best of both worlds)
 # ------------------------------------------
-def visual_chunk_pdf(pdf_path: str) -> List[Tuple[str, str]]:
+@timed("classify")
+def chunk_pages(pages: List[PageRecord], pdf_path: str) -> List[Tuple[str, str]]:
+    """
+    Chunking already-parsed pages; pdf_path is only re-read if the unstructured fallback is needed
+    """
+    count("pages_parsed", len(pages))
     try:
-        blocks, bold_supported = extract_layout_blocks(pdf_path)
+        blocks, bold_supported = blocks_from_pages(pages)
         if len(blocks) < 5:
             raise ValueError("Too few layout blocks detected.")
         return classify_blocks(blocks, bold_supported)
@@ -131,6 +269,15 @@ def visual_chunk_pdf(pdf_path: str) -> List[Tuple[str, str]]:
         return unstructured_fallback(pdf_path)
 
 
+def visual_chunk_pdf(pdf_path: str, workers: Optional[int] = None) -> List[Tuple[str, str]]:
+    try:
+        pages = extract_page_records(pdf_path, workers=workers)
+    except Exception as e:
+        print(f"[Fallback] Using unstructured: {e}")
+        return unstructured_fallback(pdf_path)
+    return chunk_pages(pages, pdf_path)
+
+
 # ------------------------------------------
 # 5. Optional Streamlit Debug View
 # ------------------------------------------
@@ -0,0 +1,55 @@
+import numpy as np
+
+import answer_cache
+from answer_cache import AnswerCache, answer_key, answer_scope
+
+SCOPE = answer_scope("file", "1", "gpt", 0.2)
+
+
+def test_answer_key_ignores_case_whitespace_and_trailing_punctuation():
+    a = answer_key("file", "What is the value?", [1, 2], "1", "gpt", 0.2)
+    b = answer_key("file", "  what IS the   value ", [1, 2], "1", "gpt", 0.2)
+    assert a == b
+    assert a != answer_key("file", "What is the value?", [2, 1], "1", "gpt", 0.2)
+    assert a != answer_key("other", "What is the value?", [1, 2], "1", "gpt", 0.2)
+
+
+def test_exact_hit_and_lru_eviction():
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, similarity_threshold=2)
+    cache.put("a", SCOPE, None, "A", [])
+    cache.put("b", SCOPE, None, "B", [])
+    assert cache.get("a") == ("A", [])
+    cache.put("c", SCOPE, None, "C", [])
+    assert cache.get("b") is None
+    assert cache.get("a") == ("A", [])
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = AnswerCache(ttl_seconds=10)
+    cache.put("a", SCOPE, np.ones(4), "A", [])
+    now[0] += 5
+    assert cache.get("a") == ("A", [])
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.get_similar(SCOPE, np.ones(4)) is None
+
+
+def test_similar_queries_reuse_answers_within_the_same_scope_only():
+    cache = AnswerCache(similarity_threshold=0.95)
+    cache.put("a", SCOPE, np.array([1.0, 0.0, 0.0]), "A", [])
+    assert cache.get_similar(SCOPE, np.array([0.99, 0.05, 0.0])) == ("A", [])
+    assert cache.get_similar(SCOPE, np.array([0.0, 1.0, 0.0])) is None
+    assert cache.get_similar(answer_scope("other", "1", "gpt", 0.2), np.array([1.0, 0.0, 0.0])) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_semantic_reuse_is_disabled_above_one_and_for_keyword_queries():
+    cache = AnswerCache(similarity_threshold=1.5)
+    cache.put("a", SCOPE, np.ones(3), "A", [])
+    assert cache.get_similar(SCOPE, np.ones(3)) is None
+    cache = AnswerCache()
+    cache.put("a", SCOPE, None, "A", [])
+    assert cache.get_similar(SCOPE, np.ones(3)) is None
@@ -0,0 +1,69 @@
+import os
+
+import faiss
+import numpy as np
+import pytest
+
+import artifact_store
+from artifact_store import artifact_key, save_artifacts, load_artifacts, has_artifacts, evict_lru
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _artifacts(n=4, dimension=8):
+    vectors = np.random.default_rng(0).standard_normal((n, dimension)).astype(np.float32)
+    index = faiss.IndexFlatIP(dimension)
+    index.add(vectors)
+    return [(f"T{i}", f"C{i}") for i in range(n)], index, vectors
+
+
+def test_key_depends_on_every_version_component():
+    key = artifact_key("hash", "1", "model", "flat_ip")
+    assert key == artifact_key("hash", "1", "model", "flat_ip")
+    assert len({key, artifact_key("hash", "2", "model", "flat_ip"), artifact_key("hash", "1", "other", "flat_ip"),
+                artifact_key("hash", "1", "model", "hnsw"), artifact_key("other", "1", "model", "flat_ip")}) == 5
+
+
+def test_round_trip_and_embedding_id_check():
+    chunks, index, vectors = _artifacts()
+    save_artifacts("k", chunks, index, vectors, embedding_id="model@8")
+    assert has_artifacts("k")
+    loaded_chunks, loaded_index, loaded_vectors = load_artifacts("k", embedding_id="model@8")
+    assert loaded_chunks == chunks
+    assert loaded_index.ntotal == 4
+    np.testing.assert_array_equal(loaded_vectors, vectors)
+    assert load_artifacts("k", embedding_id="model@16") is None
+    assert load_artifacts("missing") is None
+
+
+def test_staging_directories_do_not_remain(store):
+    chunks, index, vectors = _artifacts()
+    save_artifacts("k", chunks, index, vectors)
+    save_artifacts("k", chunks, index, vectors)
+    assert sorted(os.listdir(store)) == ["k"]
+
+
+def test_failed_save_leaves_no_partial_entry(store):
+    chunks, _, vectors = _artifacts()
+    with pytest.raises(Exception):
+        save_artifacts("k", chunks, None, vectors)
+    assert not has_artifacts("k")
+    assert os.listdir(store) == []
+
+
+def test_evict_lru_removes_least_recently_used_first(store):
+    chunks, index, vectors = _artifacts()
+    for key in ("a", "b", "c"):
+        save_artifacts(key, chunks, index, vectors)
+    for age, key in enumerate(("b", "a", "c")):
+        path = os.path.join(store, key, artifact_store.LAST_USED_FILE)
+        os.utime(path, (1000 + age, 1000 + age))
+    entry_size = artifact_store._dir_size(os.path.join(store, "a"))
+    evicted = evict_lru(max_bytes=int(entry_size * 2.5))
+    assert evicted == ["b"]
+    assert evict_lru(max_bytes=0, keep="c") == ["a"]
+    assert os.listdir(store) == ["c"]
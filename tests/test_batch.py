@@ -0,0 +1,106 @@
+import os
+import json
+import asyncio
+
+import pytest
+
+import batch
+from batch import item_key, load_completed, load_questions, run_batch
+
+QUESTIONS = ["What is the deadline?", "Is insurance required?", "Who is the buyer?"]
+
+
+@pytest.fixture
+def tenders(tmp_path):
+    paths = []
+    for name in ("a.pdf", "b.pdf"):
+        path = tmp_path / name
+        path.write_bytes(f"%PDF {name}".encode())
+        paths.append(str(path))
+    return paths
+
+
+class _Calls(list):
+    # Questions listed in failing get an error record instead of an answer
+    failing: set
+
+
+@pytest.fixture
+def answered(monkeypatch):
+    """
+    Replacing indexing and answering with stand-ins; returns the (file, question) pairs answered
+    """
+    calls = _Calls()
+    calls.failing = set()
+
+    async def prepare(pdf_path, file_hash, pool):
+        return {"chunks": [], "timings": {"parse_s": 0.0, "index_s": 0.0}}
+
+    async def answer(doc, pdf_path, file_hash, question, scheduler, model, temperature, mode):
+        calls.append((os.path.basename(pdf_path), question))
+        item = {"file": os.path.basename(pdf_path), "file_hash": file_hash, "question": question}
+        if question in calls.failing:
+            item["error"] = "RateLimitError: slow down"
+        else:
+            item["answer"] = "Yes"
+        return item
+
+    monkeypatch.setattr(batch, "_prepare_document", prepare)
+    monkeypatch.setattr(batch, "_answer_item", answer)
+    return calls
+
+
+def _records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_load_questions_skips_blanks_and_comments(tmp_path):
+    path = tmp_path / "q.txt"
+    path.write_text("# Header\nFirst?\n\n  Second?  \n", encoding="utf-8")
+    assert load_questions(str(path)) == ["First?", "Second?"]
+    path = tmp_path / "q.json"
+    path.write_text(json.dumps(["One?", " ", "Two?"]), encoding="utf-8")
+    assert load_questions(str(path)) == ["One?", "Two?"]
+
+
+def test_load_completed_ignores_errors_and_truncated_lines(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(
+        json.dumps({"file_hash": "h", "question": "Done?", "answer": "Yes"}) + "\n"
+        + json.dumps({"file_hash": "h", "question": "Failed?", "error": "boom"}) + "\n"
+        + '{"file_hash": "h", "quest',
+        encoding="utf-8",
+    )
+    assert load_completed(str(path)) == {item_key("h", "Done?")}
+    assert load_completed(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_rerun_answers_nothing_twice(tenders, answered, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    summary = asyncio.run(run_batch(tenders, QUESTIONS, output, parse_workers=1))
+    assert summary["answered"] == 6 and summary["skipped"] == 0
+    answered.clear()
+    summary = asyncio.run(run_batch(tenders, QUESTIONS, output, parse_workers=1))
+    assert answered == []
+    assert summary["skipped"] == 6
+    assert len(_records(output)) == 6
+
+
+def test_rerun_retries_only_failed_and_new_items(tenders, answered, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    answered.failing.add(QUESTIONS[1])
+    summary = asyncio.run(run_batch(tenders, QUESTIONS[:2], output, parse_workers=1))
+    assert summary["failed"] == 2
+    answered.clear()
+    answered.failing.clear()
+    summary = asyncio.run(run_batch(tenders, QUESTIONS, output, parse_workers=1))
+    assert sorted(answered) == sorted((name, q) for name in ("a.pdf", "b.pdf") for q in QUESTIONS[1:])
+    assert (summary["answered"], summary["failed"], summary["skipped"]) == (4, 0, 2)
+
+
+def test_duplicate_files_are_processed_once(tenders, answered, tmp_path):
+    duplicate = tmp_path / "copy-of-a.pdf"
+    duplicate.write_bytes(open(tenders[0], "rb").read())
+    asyncio.run(run_batch([tenders[0], str(duplicate)], QUESTIONS[:1], str(tmp_path / "out.jsonl"), parse_workers=1))
+    assert len(answered) == 1
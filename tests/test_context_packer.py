@@ -0,0 +1,57 @@
+from context_packer import split_oversized_sections, pack_context
+from tokens import count_tokens
+
+
+def test_small_sections_are_not_split():
+    chunks = [("Scope", "Short section")]
+    assert split_oversized_sections(chunks, max_tokens=50) == chunks
+
+
+def test_oversized_sections_are_split_into_bounded_numbered_parts():
+    content = "\n".join(f"Paragraph {i}: the contractor shall provide evidence of compliance." for i in range(40))
+    parts = split_oversized_sections([("Requirements", content)], max_tokens=60)
+    assert len(parts) > 1
+    assert [title for title, _ in parts] == [f"Requirements (part {i}/{len(parts)})" for i in range(1, len(parts) + 1)]
+    assert all(count_tokens(part) <= 60 for _, part in parts)
+    assert " ".join(" ".join(part.split()) for _, part in parts) == " ".join(content.split())
+
+
+def test_a_single_long_paragraph_is_split_on_words():
+    content = " ".join(["word"] * 500)
+    parts = split_oversized_sections([("Long", content)], max_tokens=50)
+    assert all(count_tokens(part) <= 50 for _, part in parts)
+    assert sum(len(part.split()) for _, part in parts) == 500
+
+
+def test_near_duplicates_are_dropped_keeping_the_better_ranked_copy():
+    text = "The contract value is estimated at two million euro excluding VAT over four years"
+    ranked = [("Value", text), ("Value (copy)", text + "."), ("Dates", "The contract starts in January 2026")]
+    stats = {}
+    packed = pack_context(ranked, token_budget=1000, stats=stats)
+    assert ("Value", text) in packed and ("Value (copy)", text + ".") not in packed
+    assert stats["near_duplicates"] == 1
+    assert stats["packed"] == 2
+
+
+def test_packing_respects_the_token_budget():
+    ranked = [(f"Section {i}", f"Distinct topic number {i} " + f"detail{i} " * 30) for i in range(10)]
+    stats = {}
+    packed = pack_context(ranked, token_budget=120, stats=stats)
+    assert packed
+    assert stats["context_tokens"] <= 120
+    assert sum(count_tokens(content) for _, content in packed) == stats["context_tokens"]
+
+
+def test_mmr_prefers_new_information_over_a_redundant_runner_up():
+    best = ("A", "alpha beta gamma delta epsilon zeta eta theta")
+    similar = ("B", "alpha beta gamma delta epsilon zeta eta iota")
+    different = ("C", "completely unrelated wording about insurance")
+    packed = pack_context([best, similar, different], token_budget=1000, mmr_lambda=0.5)
+    assert packed.index(different) < packed.index(similar)
+
+
+def test_a_single_section_over_budget_is_truncated_rather_than_dropped():
+    ranked = [("Huge", "token " * 500)]
+    packed = pack_context(ranked, token_budget=20)
+    assert len(packed) == 1
+    assert count_tokens(packed[0][1]) <= 20
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pytest
+
+from corpus_index import CorpusIndex, SHARDS_DIR, load_or_create_corpus
+
+DIM = 8
+
+
+def _unit(rows):
+    vectors = np.asarray(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _doc(axis, n=3):
+    # Every vector of a document points mostly along one axis, so a query on that axis finds it first
+    rows = np.full((n, DIM), 0.01)
+    rows[:, axis] = 1.0
+    rows[np.arange(n), (axis + 1 + np.arange(n)) % DIM] += 0.1
+    return [(f"Title {axis}.{i}", f"Content {axis}.{i}") for i in range(n)], _unit(rows)
+
+
+def _query(axis):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[axis] = 1.0
+    return vector
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = CorpusIndex(DIM, "model@8", str(tmp_path))
+    for axis in range(3):
+        corpus.add_document(f"doc{axis}", *_doc(axis), name=f"Tender {axis}.pdf")
+    return corpus
+
+
+def test_search_groups_hits_by_document_and_fills_text(corpus):
+    results = corpus.search(_query(1), k_per_doc=2)
+    assert [r["doc_id"] for r in results][0] == "doc1"
+    assert results[0]["name"] == "Tender 1.pdf"
+    assert len(results[0]["sections"]) == 2
+    for hit in results[0]["sections"]:
+        assert hit["title"] == f"Title 1.{hit['position']}"
+        assert hit["content"] == f"Content 1.{hit['position']}"
+
+
+def test_search_can_be_restricted_to_some_documents(corpus):
+    results = corpus.search(_query(1), doc_ids=["doc0", "doc2"])
+    assert {r["doc_id"] for r in results} == {"doc0", "doc2"}
+    assert corpus.search(_query(1), doc_ids=["missing"]) == []
+    assert len(corpus.search(_query(1), max_docs=1)) == 1
+
+
+def test_each_document_is_its_own_shard(corpus, tmp_path):
+    shards = sorted(os.listdir(tmp_path / SHARDS_DIR))
+    assert shards == sorted(f"doc{i}{suffix}" for i in range(3) for suffix in (".meta.json", ".npy", ".sections.json"))
+    before = os.stat(tmp_path / SHARDS_DIR / "doc0.npy").st_mtime_ns
+    corpus.add_document("doc3", *_doc(3))
+    assert os.stat(tmp_path / SHARDS_DIR / "doc0.npy").st_mtime_ns == before
+
+
+def test_reload_restores_documents_and_search(corpus, tmp_path):
+    loaded = CorpusIndex.load(str(tmp_path))
+    assert loaded.embedding_id == "model@8"
+    assert len(loaded) == len(corpus) == 9
+    assert loaded.docs.keys() == corpus.docs.keys()
+    assert loaded.search(_query(2))[0]["sections"][0]["title"].startswith("Title 2.")
+
+
+def test_replace_and_remove_update_the_shards(corpus, tmp_path):
+    chunks, vectors = _doc(1, n=2)
+    corpus.add_document("doc1", chunks, vectors)
+    corpus.remove_document("doc2")
+    loaded = CorpusIndex.load(str(tmp_path))
+    assert sorted(loaded.docs) == ["doc0", "doc1"]
+    assert len(loaded) == 5
+    assert not os.path.exists(tmp_path / SHARDS_DIR / "doc2.meta.json")
+
+
+def test_shard_without_meta_record_is_ignored(corpus, tmp_path):
+    os.remove(tmp_path / SHARDS_DIR / "doc0.meta.json")
+    assert sorted(CorpusIndex.load(str(tmp_path)).docs) == ["doc1", "doc2"]
+
+
+def test_in_memory_corpus_writes_nothing(tmp_path):
+    corpus = CorpusIndex(DIM)
+    corpus.add_document("doc0", *_doc(0))
+    assert corpus.search(_query(0))[0]["sections"][0]["content"].startswith("Content 0.")
+
+
+def test_mismatched_vector_space_is_rejected(corpus, tmp_path):
+    root = str(tmp_path / "root")
+    load_or_create_corpus(DIM, "model@8", root).add_document("doc0", *_doc(0))
+    with pytest.raises(ValueError):
+        corpus.search(np.zeros(DIM * 2, dtype=np.float32))
+    with pytest.raises(ValueError):
+        corpus.add_document("bad", [("t", "c")], np.zeros((1, DIM * 2), dtype=np.float32))
+    assert load_or_create_corpus(DIM, "model@8", root).docs.keys() == {"doc0"}
@@ -0,0 +1,70 @@
+from visual_chunker import LayoutBlock, PageRecord, NO_CONTENT
+from dedup import find_boilerplate, strip_repeated_blocks, dedup_chunks, simhash
+
+TOPICS = ["scope", "pricing", "insurance", "staffing", "security", "timeline"]
+BODY = ("The supplier shall maintain the managed service desk during business hours and report "
+        "monthly on incident volumes, resolution times and customer satisfaction for each lot")
+
+
+def _page(number, body, footer=None, footer_position=0.95):
+    blocks = [LayoutBlock(11, 0.0, body)]
+    positions = [0.5]
+    if footer is not None:
+        blocks.append(LayoutBlock(8, 0.0, footer))
+        positions.append(footer_position)
+    return PageRecord(number, blocks, False, tuple(positions))
+
+
+def test_repeated_footer_is_stripped_even_with_changing_page_numbers():
+    pages = [_page(i, f"Body text about {TOPICS[i]}", footer=f"Page {i + 1} of 6") for i in range(6)]
+    stats = {}
+    stripped = strip_repeated_blocks(pages, stats=stats)
+    assert [[block.text for block in page.blocks] for page in stripped] == [[f"Body text about {TOPICS[i]}"] for i in range(6)]
+    assert stats["boilerplate_blocks"] == 6
+    assert all(len(page.positions) == len(page.blocks) for page in stripped)
+
+
+def test_same_text_at_another_height_is_kept():
+    pages = [_page(i, f"Body about {TOPICS[i]}", footer="Confidential") for i in range(5)]
+    pages.append(_page(5, "Body about timeline", footer="Confidential", footer_position=0.4))
+    boilerplate = find_boilerplate(pages)
+    stripped = strip_repeated_blocks(pages, boilerplate=boilerplate)
+    assert [block.text for block in stripped[5].blocks] == ["Body about timeline", "Confidential"]
+    assert all(len(page.blocks) == 1 for page in stripped[:5])
+
+
+def test_text_on_too_few_pages_is_not_boilerplate():
+    pages = [_page(i, f"Body about {TOPICS[i]}", footer="Annex A" if i < 2 else None) for i in range(6)]
+    assert find_boilerplate(pages) == {}
+
+
+def test_pages_without_positions_are_untouched():
+    pages = [PageRecord(i, [LayoutBlock(8, 0.0, "Footer")], False) for i in range(5)]
+    assert strip_repeated_blocks(pages) == pages
+
+
+def test_simhash_is_close_for_near_duplicates_and_far_otherwise():
+    near = BODY.replace("monthly", "quarterly")
+    other = "Tenderers must hold ISO 27001 certification and carry professional indemnity insurance of five million"
+    assert bin(simhash(BODY) ^ simhash(BODY)).count("1") == 0
+    assert bin(simhash(BODY) ^ simhash(near)).count("1") < bin(simhash(BODY) ^ simhash(other)).count("1")
+
+
+def test_dedup_chunks_collapses_exact_and_near_duplicates():
+    chunks = [("Service desk", BODY), ("Service desk (again)", BODY.upper()), ("Other", "Different short text")]
+    stats = {}
+    kept = dedup_chunks(chunks, max_bits=64, stats=stats)
+    assert kept == [chunks[0], chunks[2]]
+    assert stats["duplicate_chunks"] == 1
+    assert stats["duplicate_tokens"] > 0
+
+
+def test_short_sections_need_the_same_title_to_collapse():
+    chunks = [("Conflicts assessment prepared", "Yes"), ("Conflicts assessment revised", "Yes"),
+              ("Conflicts assessment prepared", "Yes")]
+    assert dedup_chunks(chunks) == chunks[:2]
+
+
+def test_header_only_sections_are_never_collapsed():
+    chunks = [("Lot 1", NO_CONTENT), ("Lot 2", NO_CONTENT)]
+    assert dedup_chunks(chunks) == chunks
@@ -0,0 +1,22 @@
+from embedding_providers import make_token_batches
+
+
+def test_batches_are_consecutive_and_cover_every_input():
+    counts = [5, 3, 8, 1, 9, 2]
+    batches = make_token_batches(counts, max_tokens=10, max_items=10)
+    assert [i for batch in batches for i in batch] == list(range(len(counts)))
+
+
+def test_batches_respect_token_and_item_limits():
+    counts = [4] * 10
+    for batch in make_token_batches(counts, max_tokens=10, max_items=10):
+        assert sum(counts[i] for i in batch) <= 10
+    assert all(len(batch) <= 3 for batch in make_token_batches([1] * 10, max_tokens=100, max_items=3))
+
+
+def test_an_input_over_the_token_limit_gets_its_own_batch():
+    assert make_token_batches([2, 50, 2], max_tokens=10, max_items=10) == [[0], [1], [2]]
+
+
+def test_no_inputs_no_batches():
+    assert make_token_batches([]) == []
@@ -0,0 +1,28 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache, chunk_key
+
+
+def test_chunk_key_depends_on_model_and_text():
+    assert chunk_key("m", "text") == chunk_key("m", "text")
+    assert chunk_key("m", "text") != chunk_key("other", "text")
+    assert chunk_key("m", "text") != chunk_key("m", "text2")
+
+
+def test_round_trip_as_float32(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "e.sqlite3"))
+    cache.put_many({"a": np.array([0.5, -0.25], dtype=np.float32)})
+    found = cache.get_many(["a", "missing"])
+    assert list(found) == ["a"]
+    assert found["a"].dtype == np.float32
+    np.testing.assert_allclose(found["a"], [0.5, -0.25])
+
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "e.sqlite3"), max_rows=2)
+    cache.put_many({"a": np.ones(2)})
+    cache.put_many({"b": np.ones(2)})
+    cache.get_many(["a"])
+    cache.put_many({"c": np.ones(2)})
+    assert len(cache) == 2
+    assert sorted(cache.get_many(["a", "b", "c"])) == ["a", "c"]
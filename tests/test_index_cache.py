@@ -0,0 +1,58 @@
+import faiss
+import numpy as np
+
+from index_cache import IndexCache, index_nbytes, document_nbytes
+from lexical_index import BM25Index
+
+
+def _doc(n_vectors, dimension=16):
+    chunks = [(f"Section {i}", f"text {i}") for i in range(n_vectors)]
+    index = faiss.IndexFlatIP(dimension)
+    index.add(np.random.default_rng(0).standard_normal((n_vectors, dimension)).astype(np.float32))
+    return {"chunks": chunks, "index": index, "lexical": BM25Index(chunks)}
+
+
+def test_index_nbytes_counts_codes():
+    assert index_nbytes(_doc(10, 16)["index"]) == 10 * 16 * 4
+    sq = faiss.IndexScalarQuantizer(16, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    sq.train(np.zeros((1, 16), dtype=np.float32))
+    sq.add(np.zeros((10, 16), dtype=np.float32))
+    assert index_nbytes(sq) == 10 * 16 * 2
+
+
+def test_lru_eviction_keeps_the_cache_under_its_byte_budget():
+    docs = {name: _doc(50) for name in "abc"}
+    size = document_nbytes(docs["a"])
+    cache = IndexCache(max_bytes=int(size * 2.5))
+    cache.put("a", docs["a"])
+    cache.put("b", docs["b"])
+    assert cache.get("a") is docs["a"]
+    cache.put("c", docs["c"])
+    assert "b" not in cache and "a" in cache and "c" in cache
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["resident_bytes"] <= cache.max_bytes
+
+
+def test_the_newest_entry_is_kept_even_over_budget():
+    cache = IndexCache(max_bytes=1)
+    cache.put("a", _doc(5))
+    cache.put("b", _doc(5))
+    assert len(cache) == 1 and "b" in cache
+
+
+def test_replacing_an_entry_does_not_double_count_it():
+    doc = _doc(20)
+    cache = IndexCache()
+    cache.put("a", doc)
+    cache.put("a", doc)
+    assert cache.stats()["resident_bytes"] == document_nbytes(doc)
+
+
+def test_hit_rate():
+    cache = IndexCache()
+    cache.put("a", _doc(3))
+    cache.get("a")
+    cache.get("missing")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
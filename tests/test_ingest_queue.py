@@ -0,0 +1,95 @@
+import io
+import threading
+
+import faiss
+import numpy as np
+import pytest
+
+import artifact_store
+from index_cache import IndexCache
+from ingest_queue import IngestQueue, _document
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "CACHE_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """
+    A queue whose parse/embed/index step is replaced by a stand-in that records every call;
+    uploads whose bytes start with b"bad" fail
+    """
+    queue = IngestQueue(workers=2)
+    queue.calls = []
+    queue.release = threading.Event()
+    queue.release.set()
+
+    def prepare(job, data):
+        queue.calls.append(job.file_hash)
+        queue.release.wait(5)
+        if data.startswith(b"bad"):
+            raise ValueError("not a PDF")
+        chunks = [("Title", data.decode())]
+        index = faiss.IndexFlatIP(4)
+        index.add(np.ones((1, 4), dtype=np.float32))
+        return _document(chunks, index)
+
+    monkeypatch.setattr(queue, "_prepare", prepare)
+    yield queue
+    queue.shutdown()
+
+
+def test_same_hash_is_processed_once(queue):
+    queue.release.clear()
+    first = queue.submit(io.BytesIO(b"tender"), "a.pdf", file_hash="h1")
+    # Queued or running: the same job comes back, from any session
+    assert queue.submit(io.BytesIO(b"tender"), "copy.pdf", file_hash="h1") is first
+    queue.release.set()
+    assert first.wait(5) and first.status == "ready"
+    assert queue.submit(io.BytesIO(b"tender"), "a.pdf", file_hash="h1") is first
+    assert queue.calls == ["h1"]
+    assert queue.document("h1")["chunks"] == [("Title", "tender")]
+
+
+def test_hash_is_computed_when_not_given(queue):
+    job = queue.submit(io.BytesIO(b"tender"), "a.pdf")
+    assert job.wait(5)
+    assert queue.submit(io.BytesIO(b"tender"), "b.pdf") is job
+    assert len(queue.calls) == 1
+
+
+def test_failed_job_stays_failed_until_retried(queue):
+    upload = io.BytesIO(b"bad upload")
+    job = queue.submit(upload, "a.pdf", file_hash="h1")
+    assert job.wait(5)
+    assert job.status == "failed"
+    assert job.error == "ValueError: not a PDF"
+    for _ in range(3):
+        assert queue.submit(upload, "a.pdf", file_hash="h1") is job
+    assert queue.calls == ["h1"]
+    assert job.error == "ValueError: not a PDF"
+
+    retried = queue.submit(upload, "a.pdf", file_hash="h1", retry=True)
+    assert retried is not job
+    assert retried.wait(5) and retried.status == "failed"
+    assert queue.calls == ["h1", "h1"]
+
+
+def test_retry_does_not_requeue_a_ready_job(queue):
+    job = queue.submit(io.BytesIO(b"tender"), "a.pdf", file_hash="h1")
+    assert job.wait(5)
+    assert queue.submit(io.BytesIO(b"tender"), "a.pdf", file_hash="h1", retry=True) is job
+    assert queue.calls == ["h1"]
+
+
+def test_ready_job_evicted_everywhere_is_requeued(queue):
+    job = queue.submit(io.BytesIO(b"tender"), "a.pdf", file_hash="h1")
+    assert job.wait(5)
+    # Evicted from memory, and never stored on disk by the stand-in
+    queue.cache = IndexCache()
+    again = queue.submit(io.BytesIO(b"tender"), "a.pdf", file_hash="h1")
+    assert again is not job
+    assert again.wait(5) and again.status == "ready"
+    assert queue.calls == ["h1", "h1"]
@@ -0,0 +1,97 @@
+import faiss
+import numpy as np
+import pytest
+
+from lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from vector_store import hybrid_search_ids
+
+CHUNKS = [
+    ("Scope", "The contractor shall supply office furniture to all sites."),
+    ("Insurance", "Public liability insurance of at least five million is required."),
+    ("Standards", "Equipment must conform to ISO/IEC 27001 and CPV code 45000000-7."),
+    ("Payment", "Invoices are paid within thirty days of receipt."),
+    ("Insurance renewal", "Insurance certificates must be renewed each year; insurance lapses void the contract."),
+]
+
+
+def test_tokenize_keeps_codes_and_drops_stopwords():
+    assert tokenize("The CPV code is 45000000-7 under clause 3.2.1") == ["cpv", "code", "45000000-7", "under", "clause", "3.2.1"]
+
+
+def test_bm25_ranks_term_matches_and_skips_the_rest():
+    results = BM25Index(CHUNKS).search("insurance", k=10)
+    assert [i for i, _ in results] == [4, 1]
+    assert all(score > 0 for _, score in results)
+    assert BM25Index(CHUNKS).search("helicopter") == []
+
+
+def test_bm25_rare_terms_outweigh_common_ones():
+    index = BM25Index([("A", "alpha common"), ("B", "beta common"), ("C", "gamma common"), ("D", "alpha")])
+    # Same length and term frequency: the chunk with the rarer term ("beta") wins
+    scores = dict(index.search("beta alpha", k=10))
+    assert scores[1] > scores[0]
+
+
+def test_bm25_respects_k_and_handles_an_empty_index():
+    assert len(BM25Index(CHUNKS).search("insurance contractor invoices", k=2)) == 2
+    assert BM25Index([]).search("insurance") == []
+    assert len(BM25Index(CHUNKS)) == len(CHUNKS)
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 2, 4]], k=10)
+    assert fused[0] in (2, 3)
+    assert set(fused) == {1, 2, 3, 4}
+    assert fused.index(2) < fused.index(1) and fused.index(2) < fused.index(4)
+    assert reciprocal_rank_fusion([[5, 6], [6, 5]], k=1) == [5]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def _dense_index():
+    # Similarity to chunk 3's vector ranks the chunks 3, 0, 2, then 1 and 4 (which point away from it)
+    vectors = np.zeros((len(CHUNKS), 8), dtype=np.float32)
+    vectors[:, 0] = [0.6, -1.0, 0.3, 1.0, -1.0]
+    vectors[:, 1:6] = np.eye(len(CHUNKS)) * 0.5
+    index = faiss.IndexFlatIP(8)
+    index.add(vectors)
+    return index, vectors
+
+
+@pytest.mark.parametrize("mode", ["semantic", "hybrid", "keyword"])
+def test_hybrid_search_modes(mode):
+    index, vectors = _dense_index()
+    lexical = BM25Index(CHUNKS)
+    # The query vector points at chunk 3 while its words only match chunks 1 and 4
+    ids = hybrid_search_ids("insurance", index, lexical, k=3, mode=mode, query_vector=vectors[3:4])
+    if mode == "semantic":
+        assert ids == [3, 0, 2]
+    elif mode == "keyword":
+        assert ids == [4, 1]
+    else:
+        # Each list's top hit ties on fused score, ahead of both second places
+        assert ids == [3, 4, 0]
+
+
+def test_hybrid_falls_back_to_dense_without_keyword_hits():
+    index, vectors = _dense_index()
+    ids = hybrid_search_ids("helicopter", index, BM25Index(CHUNKS), k=2, mode="hybrid", query_vector=vectors[3:4])
+    assert ids == [3, 0]
+
+
+def test_unknown_mode_is_rejected():
+    index, vectors = _dense_index()
+    with pytest.raises(ValueError):
+        hybrid_search_ids("q", index, BM25Index(CHUNKS), mode="fuzzy", query_vector=vectors[0:1])
+
+
+def test_extend_matches_building_all_at_once():
+    built = BM25Index(CHUNKS)
+    grown = BM25Index(CHUNKS[:1])
+    grown.search("insurance")
+    grown.extend(CHUNKS[1:3])
+    grown.search("contractor")
+    grown.extend(CHUNKS[3:])
+    assert len(grown) == len(built)
+    for query in ("insurance", "insurance contractor invoices", "45000000-7 iso/iec", "helicopter"):
+        assert grown.search(query) == pytest.approx(built.search(query))
+    assert grown.nbytes == built.nbytes
@@ -0,0 +1,65 @@
+import httpx2
+import openai
+import pytest
+
+import llm_client
+from llm_client import backoff_delay, run_sync, with_retries
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    # The shared client is created on first use and needs a key, not a reachable server
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+
+def _error(cls, status, retry_after="0"):
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    response = httpx2.Response(status, headers=headers, request=httpx2.Request("POST", "http://test/v1/embeddings"))
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return call, calls
+
+
+@pytest.mark.parametrize("cls, status", [(openai.RateLimitError, 429), (openai.InternalServerError, 500),
+                                         (openai.InternalServerError, 503)])
+def test_transient_errors_are_retried(cls, status):
+    call, calls = _flaky([_error(cls, status), _error(cls, status)])
+    stats = {}
+    assert run_sync(with_retries(call, max_retries=3, stats=stats)) == "ok"
+    assert len(calls) == 3
+    assert stats["retries"] == 2
+
+
+def test_retries_give_up_after_max_retries():
+    call, calls = _flaky([_error(openai.RateLimitError, 429)] * 5)
+    failures = llm_client.client_stats()["failures"]
+    with pytest.raises(openai.RateLimitError):
+        run_sync(with_retries(call, max_retries=2))
+    assert len(calls) == 3
+    assert llm_client.client_stats()["failures"] == failures + 1
+
+
+def test_client_errors_are_not_retried():
+    call, calls = _flaky([_error(openai.BadRequestError, 400)])
+    stats = {}
+    with pytest.raises(openai.BadRequestError):
+        run_sync(with_retries(call, max_retries=3, stats=stats))
+    assert len(calls) == 1
+    assert stats == {}
+
+
+def test_backoff_honours_retry_after_then_grows_exponentially():
+    assert 2.0 <= backoff_delay(0, _error(openai.RateLimitError, 429, retry_after="2")) <= 3.0
+    assert 0.5 <= backoff_delay(0, _error(openai.RateLimitError, 429, retry_after=None)) <= 0.75
+    assert 4.0 <= backoff_delay(3) <= 6.0
+    assert backoff_delay(20) <= 45.0